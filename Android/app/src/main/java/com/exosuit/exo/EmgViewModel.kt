@@ -148,6 +148,14 @@ class EmgViewModel(application: Application) : AndroidViewModel(application) {
             _trainingProgress.value = percent
         }
 
+        udpController.etaCallback = { seconds ->
+            _trainingStatus.value = "Training... about ${seconds}s left"
+        }
+
+        udpController.queueCallback = { position ->
+            _trainingStatus.value = "Waiting for the training server (queue position $position)"
+        }
+
         udpController.errorCallback = { err ->
             udpController.resetModelReceived()
             _trainingStatus.value = "Server error: $err"
@@ -580,6 +588,7 @@ class EmgViewModel(application: Application) : AndroidViewModel(application) {
                     val ridgeModel = model as ModelData.RidgeExoModel
                     append("Window size: ${ridgeModel.preprocessing.window_size}\n")
                     append("Features: ${ridgeModel.preprocessing.features.joinToString(", ")}\n")
+                    ridgeModel.preprocessing.alpha?.let { append("Alpha: $it\n") }
                     append("Type: Ridge for Exo\n")
                 }
 
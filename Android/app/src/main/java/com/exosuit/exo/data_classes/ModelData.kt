@@ -25,7 +25,8 @@ sealed class ModelData {
             val window_size: Int,
             val features: List<String>,
             val mse: Double? = null,
-            val mae: Double? = null
+            val mae: Double? = null,
+            val alpha: Double? = null
         )
     }
 }
\ No newline at end of file
@@ -40,6 +40,9 @@ class UdpMotorController private constructor(private val appScope: CoroutineScop
         private var trainingServerIp: String? =  null
         private const val trainingServerPort = 12346
         private const val trainedModelListenPort = 12347
+        // Binary model download packets: "MDL1", transfer id, chunk index, total chunks, file size, chunk size
+        private val modelDownloadMagic = "MDL1".toByteArray(Charsets.US_ASCII)
+        private const val modelDownloadHeaderSize = 22
 
 
         fun getRaspiServerIp(context: Context): String { //Change if needed
@@ -112,13 +115,29 @@ class UdpMotorController private constructor(private val appScope: CoroutineScop
 
     // --- MLP chunk storage ---
     private val mlpChunks = mutableMapOf<Int, ByteArray>()
+
+    /** Binary model download in progress (see handleModelDownloadPacket) */
+    private class ModelDownload(val id: Int, val total: Int, val size: Int, val chunkSize: Int, val server: InetAddress) {
+        val data = ByteArray(size)
+        val received = BooleanArray(total)
+        var count = 0
+        var highest = -1
+        fun missing(from: Int = 0, end: Int = total) = (from until end).filter { !received[it] }
+    }
+    private var modelDownload: ModelDownload? = null
+    private var completedDownloadId: Int? = null
     @Volatile
     private var modelReceived = false
+    // Last queue/progress message from the training server; the model wait timeout restarts from it
+    @Volatile
+    private var lastTrainingActivity = 0L
 
     // --- Callbacks ---
     var ridgeCallback: ((String) -> Unit)? = null
     var tfliteCallback: ((ByteArray) -> Unit)? = null
     var progressCallback: ((Int) -> Unit)? = null
+    var etaCallback: ((Int) -> Unit)? = null
+    var queueCallback: ((Int) -> Unit)? = null
     var errorCallback: ((String) -> Unit)? = null
 
     init {
@@ -360,6 +379,10 @@ class UdpMotorController private constructor(private val appScope: CoroutineScop
                 val packet = DatagramPacket(buffer, buffer.size)
                 try {
                     socket.receive(packet)
+                    if (isModelDownloadPacket(packet)) {
+                        handleModelDownloadPacket(socket, packet)
+                        continue
+                    }
                     val msg = String(packet.data, 0, packet.length)
                     Log.d("MyoScan", "Received UDP message: $msg")
                     when {
@@ -371,7 +394,14 @@ class UdpMotorController private constructor(private val appScope: CoroutineScop
                             markModelReceived()
                             tfliteCallback?.invoke(fullModel)
                         }
+                        msg.startsWith("TRAINING_QUEUED:") -> {
+                            lastTrainingActivity = System.currentTimeMillis()
+                            msg.removePrefix("TRAINING_QUEUED:").trim().toIntOrNull()?.let { position ->
+                                queueCallback?.invoke(position)
+                            }
+                        }
                         msg.startsWith("TRAINING_PROGRESS") -> {
+                            lastTrainingActivity = System.currentTimeMillis()
                             Log.d("MyoScan" ,"TRAINING_PROGRESS match")
 
                             val progressPattern = """TRAINING_PROGRESS[:\s]*(\d+)/(\d+)""".toRegex()
@@ -383,6 +413,10 @@ class UdpMotorController private constructor(private val appScope: CoroutineScop
                                 val percent = (current.toFloat() / total.toFloat() * 100).toInt()
                                 Log.d("MyoScan", "Parsed progress: $current/$total = $percent%")
                                 progressCallback?.invoke(percent)
+                                // Optional " ETA:<seconds>s" from servers that measure training throughput
+                                """ETA:(\d+)s""".toRegex().find(msg)?.groupValues?.get(1)?.toIntOrNull()?.let { seconds ->
+                                    etaCallback?.invoke(seconds)
+                                }
                             }else{
                                 Log.d("MyoScan" ,"TRAINING_PROGRESS match = null")
                             }
@@ -391,7 +425,8 @@ class UdpMotorController private constructor(private val appScope: CoroutineScop
                     }
 
                 } catch (_: SocketTimeoutException) {
-                    // continue listening
+                    // continue listening; ask again for anything a stalled model download is missing
+                    modelDownload?.let { sendDownloadNack(socket, it, it.missing()) }
                 } catch (e: Exception) {
                     Log.e("MyoScan", "Listener exception: ${e.message}", e)
                 }
@@ -399,6 +434,83 @@ class UdpMotorController private constructor(private val appScope: CoroutineScop
         }
     }
 
+    private fun isModelDownloadPacket(packet: DatagramPacket): Boolean {
+        if (packet.length < modelDownloadHeaderSize) return false
+        for (i in modelDownloadMagic.indices) if (packet.data[packet.offset + i] != modelDownloadMagic[i]) return false
+        return true
+    }
+
+    private fun sendDownloadReply(socket: DatagramSocket, server: InetAddress, msg: String) {
+        val bytes = msg.toByteArray()
+        socket.send(DatagramPacket(bytes, bytes.size, server, trainingServerPort))
+    }
+
+    private fun sendDownloadNack(socket: DatagramSocket, download: ModelDownload, missing: List<Int>) {
+        if (missing.isEmpty()) return
+        // At most 200 indices per NACK; the rest are asked for again on the next gap or probe
+        sendDownloadReply(socket, download.server,
+            "MODEL_NACK:${download.id.toUInt()}:" + missing.take(200).joinToString(","))
+    }
+
+    /**
+     * One packet of a binary model download. Chunks are copied straight into the model
+     * buffer. Skipped chunks are NACKed as soon as a later one arrives, and everything
+     * still missing is NACKed when the last chunk (or the server's repeat of it) arrives.
+     * Once complete the server gets MODEL_DONE and the model goes to tfliteCallback.
+     */
+    private fun handleModelDownloadPacket(socket: DatagramSocket, packet: DatagramPacket) {
+        try {
+            val header = ByteBuffer.wrap(packet.data, packet.offset, packet.length)
+            header.position(header.position() + 4)
+            val id = header.int
+            val index = header.int
+            val total = header.int
+            val size = header.int
+            val chunkSize = header.short.toInt() and 0xFFFF
+            lastTrainingActivity = System.currentTimeMillis()
+
+            if (id == completedDownloadId) {
+                // Our MODEL_DONE was lost and the server is probing
+                sendDownloadReply(socket, packet.address, "MODEL_DONE:${id.toUInt()}")
+                return
+            }
+            var download = modelDownload
+            if (download == null || download.id != id) {
+                if (total <= 0 || size < 0 || chunkSize <= 0) return
+                download = ModelDownload(id, total, size, chunkSize, packet.address)
+                modelDownload = download
+            }
+            if (index !in 0 until download.total) return
+
+            val offset = index * download.chunkSize
+            val length = packet.length - modelDownloadHeaderSize
+            if (!download.received[index] && offset + length <= download.size) {
+                System.arraycopy(packet.data, packet.offset + modelDownloadHeaderSize, download.data, offset, length)
+                download.received[index] = true
+                download.count++
+            }
+
+            if (download.count == download.total) {
+                modelDownload = null
+                completedDownloadId = id
+                sendDownloadReply(socket, packet.address, "MODEL_DONE:${id.toUInt()}")
+                markModelReceived()
+                tfliteCallback?.invoke(download.data)
+                return
+            }
+
+            val missing = when {
+                index == download.total - 1 -> download.missing()
+                index > download.highest + 1 -> download.missing(download.highest + 1, index)
+                else -> emptyList()
+            }
+            download.highest = maxOf(download.highest, index)
+            sendDownloadNack(socket, download, missing)
+        } catch (e: Exception) {
+            Log.e("MyoScan", "Model download packet failed: ${e.message}", e)
+        }
+    }
+
     private fun handleMLPChunk(msg: String, onComplete: (ByteArray) -> Unit) {
         try {
             val parts = msg.split(":", limit = 4)
@@ -425,11 +537,127 @@ class UdpMotorController private constructor(private val appScope: CoroutineScop
 
     fun prepareForNewTraining() {
         mlpChunks.clear()
+        modelDownload = null
         resetModelReceived()
         sendSocket?.close()
         sendSocket = null
     }
 
+    /** Training upload encodings the trainer server accepts, named in the header's MODEL_TYPE line */
+    enum class UploadFormat { CSV, F32 }
+
+    var uploadFormat = UploadFormat.F32
+
+    /** Chunks in flight asked for in SACK mode; the server may grant fewer. 0 = stop-and-wait */
+    var uploadWindow = 64
+
+    /**
+     * Encodes a recording CSV (header row, EMG channels, then the one-hot label columns)
+     * as the server's F32 upload: a 16-byte little-endian header followed by one float32
+     * column after another. Returns null if the CSV cannot be parsed.
+     */
+    private fun encodeF32Upload(csvData: String, numLabels: Int = 4): ByteArray? {
+        return try {
+            val lines = csvData.lineSequence().drop(1).filter { it.isNotBlank() }.toList()
+            if (lines.isEmpty()) return null
+            val columns = lines[0].split(",").size
+            val channels = columns - numLabels
+            if (channels <= 0) return null
+            val samples = lines.size
+            val values = FloatArray(columns * samples)
+            for ((row, line) in lines.withIndex()) {
+                val fields = line.split(",")
+                if (fields.size != columns) return null
+                for (col in 0 until columns) values[col * samples + row] = fields[col].trim().toFloat()
+            }
+
+            val buffer = ByteBuffer.allocate(16 + values.size * 4).order(ByteOrder.LITTLE_ENDIAN)
+            buffer.put("EMGC".toByteArray(Charsets.US_ASCII))
+            buffer.putShort(1)                      // version
+            buffer.putShort(channels.toShort())
+            buffer.putShort(numLabels.toShort())
+            buffer.putShort(1)                      // dtype: float32
+            buffer.putInt(samples)
+            buffer.asFloatBuffer().put(values)
+            buffer.array()
+        } catch (e: NumberFormatException) {
+            Log.w("MyoScan", "CSV not numeric, uploading as CSV: ${e.message}")
+            null
+        }
+    }
+
+    /**
+     * Windowed upload for servers that answered HEADER_ACK:SACK:<window>. Keeps up to
+     * window chunks in flight past the server's cumulative ACK and reads its
+     * "SACK:<cum>:<base>:<hex bitmap>" replies: a hole is resent as soon as a chunk sent
+     * after it shows up as received, anything else unacknowledged is resent after a timeout.
+     * Returns null once the server has everything, else a reason for the failure.
+     */
+    private fun sendChunksWindowed(
+        socket: DatagramSocket, address: InetAddress, chunks: List<ByteArray>, window: Int
+    ): String? {
+        val total = chunks.size
+        val acked = BooleanArray(total)
+        val sentAt = LongArray(total)
+        var cum = 0
+        var next = 0
+        val packets = chunks.mapIndexed { i, chunk ->
+            val packetData = ByteBuffer.allocate(8).putInt(i).putInt(total).array() + chunk
+            DatagramPacket(packetData, packetData.size, address, trainingServerPort)
+        }
+        fun send(i: Int) {
+            socket.send(packets[i])
+            sentAt[i] = System.currentTimeMillis()
+        }
+
+        val buf = ByteArray(512)
+        val recv = DatagramPacket(buf, buf.size)
+        socket.soTimeout = 20
+        val deadline = System.currentTimeMillis() + 60000
+        while (System.currentTimeMillis() < deadline) {
+            // Timeout retransmits, then fill the window
+            val now = System.currentTimeMillis()
+            for (i in cum until minOf(next, total)) {
+                if (!acked[i] && now - sentAt[i] > 300) send(i)
+            }
+            while (next < total && next < cum + window) send(next++)
+
+            try {
+                while (true) {
+                    recv.length = buf.size
+                    socket.receive(recv)
+                    val msg = String(recv.data, 0, recv.length)
+                    if (msg == "ALL_CHUNKS_RECEIVED") return null
+                    if (!msg.startsWith("SACK:")) continue
+                    val parts = msg.split(":")
+                    if (parts.size < 4) continue
+                    val ackCum = parts[1].toIntOrNull() ?: continue
+                    val base = parts[2].toIntOrNull() ?: continue
+                    for (i in cum until minOf(ackCum, total)) acked[i] = true
+                    cum = maxOf(cum, ackCum)
+                    if (cum >= total) return null
+
+                    var newest = -1
+                    val bitmap = parts[3]
+                    for (b in 0 until bitmap.length / 2) {
+                        val bits = bitmap.substring(2 * b, 2 * b + 2).toInt(16)
+                        for (k in 0 until 8) {
+                            val i = base + 8 * b + k
+                            if (i < total && (bits and (1 shl k)) != 0) { acked[i] = true; newest = i }
+                        }
+                    }
+                    // Fast retransmit: anything sent before a chunk that already arrived is lost
+                    if (newest >= 0) {
+                        for (i in cum until newest) {
+                            if (!acked[i] && sentAt[i] < sentAt[newest]) send(i)
+                        }
+                    }
+                }
+            } catch (_: SocketTimeoutException) {}
+        }
+        return "Upload timed out at chunk $cum of $total"
+    }
+
     fun sendTrainingData(context: Context ,csvData: String, modelType: ModelType, onComplete: (Boolean, String) -> Unit ) {
         prepareForNewTraining()
         sendSocket = DatagramSocket().apply { reuseAddress = true }
@@ -437,7 +665,9 @@ class UdpMotorController private constructor(private val appScope: CoroutineScop
         appScope.launch(Dispatchers.IO) {
             try {
                 val socket = sendSocket ?: return@launch
-                val data = csvData.toByteArray()
+                val encoded = if (uploadFormat == UploadFormat.F32) encodeF32Upload(csvData) else null
+                val format = if (encoded != null) UploadFormat.F32 else UploadFormat.CSV
+                val data = encoded ?: csvData.toByteArray()
                 val trainingAddress = InetAddress.getByName(getTrainingServerIp(context))
                 val chunkSize = 1400
                 val totalChunks = (data.size + chunkSize - 1) / chunkSize
@@ -448,8 +678,11 @@ class UdpMotorController private constructor(private val appScope: CoroutineScop
                 }
 
                 // Send header
-                val header = "MODEL_TYPE:${modelType.name}\nTOTAL_CHUNKS:$totalChunks"
+                var header = "MODEL_TYPE:${modelType.name}:${format.name}\nTOTAL_CHUNKS:$totalChunks\nCHUNK_SIZE:$chunkSize"
+                if (uploadWindow > 0) header += "\nACK_MODE:SACK\nWINDOW:$uploadWindow"
+                header += "\nMODEL_DOWNLOAD:BINARY"
                 var headerAck = false
+                var sackWindow = 0
                 repeat(3) {
                     if (!headerAck) {
                         socket.send(DatagramPacket(header.toByteArray(), header.length, trainingAddress, trainingServerPort))
@@ -458,7 +691,12 @@ class UdpMotorController private constructor(private val appScope: CoroutineScop
                             val ackPacket = DatagramPacket(ackBuf, ackBuf.size)
                             socket.soTimeout = 2000
                             socket.receive(ackPacket)
-                            if (String(ackPacket.data, 0, ackPacket.length) == "HEADER_ACK") headerAck = true
+                            val reply = String(ackPacket.data, 0, ackPacket.length)
+                            if (reply.startsWith("HEADER_ACK")) {
+                                headerAck = true
+                                // "HEADER_ACK:SACK:<window>" from servers that support windowed uploads
+                                sackWindow = reply.split(":").getOrNull(2)?.toIntOrNull() ?: 0
+                            }
                         } catch (_: SocketTimeoutException) {}
                     }
                 }
@@ -469,7 +707,13 @@ class UdpMotorController private constructor(private val appScope: CoroutineScop
                 }
 
                 // Send chunks
-                for ((i, chunk) in chunksMap) {
+                if (sackWindow > 0) {
+                    val failure = sendChunksWindowed(socket, trainingAddress, chunksMap.values.toList(), sackWindow)
+                    if (failure != null) {
+                        onComplete(false, failure)
+                        return@launch
+                    }
+                } else for ((i, chunk) in chunksMap) {
                     var ack = false
                     var retries = 0
                     while (!ack && retries < 5) {
@@ -493,9 +737,9 @@ class UdpMotorController private constructor(private val appScope: CoroutineScop
                     }
                 }
 
-                // Wait for model to arrive
-                val start = System.currentTimeMillis()
-                while (!isModelReceived() && System.currentTimeMillis() - start < 20000) delay(100)
+                // Wait for model to arrive; queue position and progress messages keep the wait alive
+                lastTrainingActivity = System.currentTimeMillis()
+                while (!isModelReceived() && System.currentTimeMillis() - lastTrainingActivity < 20000) delay(100)
 
                 socket.close()
                 sendSocket = null
@@ -0,0 +1,99 @@
+# command_dedup.py
+# Wrapper around MotorController / MockMotorController that suppresses target
+# writes within epsilon of the last value sent to the same motor. Unchanged
+# targets are still refreshed every keepalive_period seconds. Every other
+# method is forwarded to the wrapped controller unchanged.
+# Writes come from the motor IO thread while invalidate() runs on the asyncio
+# thread, so the last-value table is only touched under a lock.
+import threading
+import time
+
+
+class DedupMotorController:
+    def __init__(self, motor_controller, epsilon=5e-4, keepalive_period=0.5, clock=time.monotonic):
+        self._mc = motor_controller
+        self.epsilon = epsilon
+        self.keepalive_period = keepalive_period
+        self.clock = clock
+        self._last = {}  # (kind, motor_no) -> (value, time sent); guarded by _lock
+        self._lock = threading.Lock()
+
+        self.sent = 0
+        self.suppressed = 0
+        self.keepalives = 0  # unchanged values re-sent as refresh
+
+    def __getattr__(self, name):
+        return getattr(self._mc, name)
+
+    # ---------------------- Dedup core ----------------------
+    def _filter(self, kind, motor_nos, values):
+        """Split (motor_nos, values) into the writes that must actually go out."""
+        now = self.clock()
+        send_nos, send_values = [], []
+        with self._lock:
+            for motor_no, value in zip(motor_nos, values):
+                last = self._last.get((kind, motor_no))
+                if last is not None and abs(value - last[0]) <= self.epsilon:
+                    if now - last[1] < self.keepalive_period:
+                        self.suppressed += 1
+                        continue
+                    self.keepalives += 1
+                send_nos.append(motor_no)
+                send_values.append(value)
+        return send_nos, send_values, now
+
+    def _remember(self, kind, motor_nos, values, now):
+        with self._lock:
+            for motor_no, value in zip(motor_nos, values):
+                self._last[(kind, motor_no)] = (value, now)
+            self.sent += len(motor_nos)
+
+    def invalidate(self, motor_no=None):
+        """Forget last sent values so the next write goes out (e.g. after a mode change)."""
+        with self._lock:
+            if motor_no is None:
+                self._last.clear()
+            else:
+                for key in [k for k in self._last if k[1] == motor_no]:
+                    del self._last[key]
+
+    # ---------------------- Deduplicated commands ----------------------
+    def set_target_position(self, motor_no, position):
+        nos, vals, now = self._filter("position", (motor_no,), (position,))
+        if nos:
+            self._mc.set_target_position(motor_no, position)
+            self._remember("position", nos, vals, now)
+
+    def set_target_torque(self, motor_no, torque):
+        nos, vals, now = self._filter("torque", (motor_no,), (torque,))
+        if nos:
+            self._mc.set_target_torque(motor_no, torque)
+            self._remember("torque", nos, vals, now)
+
+    def set_target_positions(self, motor_nos, positions):
+        nos, vals, now = self._filter("position", motor_nos, positions)
+        if nos:
+            self._mc.set_target_positions(nos, vals)
+            self._remember("position", nos, vals, now)
+
+    def set_target_torques(self, motor_nos, torques):
+        nos, vals, now = self._filter("torque", motor_nos, torques)
+        if nos:
+            self._mc.set_target_torques(nos, vals)
+            self._remember("torque", nos, vals, now)
+
+    # Mode changes reset the motor's setpoints, so always resend afterwards
+    def set_only_motor_mode(self, motor_no, mode):
+        self.invalidate(motor_no)
+        self._mc.set_only_motor_mode(motor_no, mode)
+
+    def set_motor_mode(self, motor_no, mode):
+        self.invalidate(motor_no)
+        self._mc.set_motor_mode(motor_no, mode)
+
+    def get_stats(self):
+        return {
+            "sent": self.sent,
+            "suppressed": self.suppressed,
+            "keepalives": self.keepalives,
+        }
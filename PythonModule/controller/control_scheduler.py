@@ -0,0 +1,84 @@
+# control_scheduler.py
+# Fixed-rate scheduler for the control loop. Ticks are placed on absolute
+# deadlines taken from a monotonic clock, so compute time and executor round
+# trips no longer add up into the control period.
+import asyncio
+import time
+
+OVERRUN_SKIP = "skip"          # drop missed ticks and realign to the next deadline
+OVERRUN_CATCH_UP = "catch_up"  # run missed ticks back-to-back until on time again
+
+
+class FixedRateScheduler:
+    def __init__(self, period, overrun_policy=OVERRUN_SKIP, max_catch_up=3, clock=time.monotonic):
+        if period <= 0:
+            raise ValueError("Scheduler period must be positive")
+        if overrun_policy not in (OVERRUN_SKIP, OVERRUN_CATCH_UP):
+            raise ValueError(f"Unknown overrun policy: {overrun_policy}")
+
+        self.period = period
+        self.overrun_policy = overrun_policy
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+
+        self.next_deadline = None
+        self.tick_count = 0
+        self.skipped_ticks = 0
+        self.last_lateness = 0.0
+        self.max_lateness = 0.0
+        self._lateness_sum = 0.0
+        self._start_time = None
+
+    def reset(self):
+        """Restart the deadline grid from the current time."""
+        self._start_time = self.clock()
+        self.next_deadline = self._start_time
+
+    async def wait_next(self):
+        """
+        Sleep until the next absolute deadline and return the lateness (seconds)
+        of this tick. Overrun ticks are handled according to overrun_policy.
+        """
+        if self.next_deadline is None:
+            self.reset()
+
+        now = self.clock()
+        delay = self.next_deadline - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+            now = self.clock()
+        else:
+            # Overrun: still yield once so other tasks (UDP handlers) can run
+            await asyncio.sleep(0)
+
+        lateness = max(0.0, now - self.next_deadline)
+        self._record(lateness)
+
+        missed = int(lateness // self.period)
+        if missed > 0 and (self.overrun_policy == OVERRUN_SKIP or missed > self.max_catch_up):
+            # Realign to the deadline grid instead of bursting through old ticks
+            self.skipped_ticks += missed
+            self.next_deadline += (missed + 1) * self.period
+        else:
+            self.next_deadline += self.period
+        return lateness
+
+    def _record(self, lateness):
+        self.tick_count += 1
+        self.last_lateness = lateness
+        self._lateness_sum += lateness
+        if lateness > self.max_lateness:
+            self.max_lateness = lateness
+
+    def get_stats(self):
+        """Return tick statistics; lateness values are in milliseconds."""
+        elapsed = (self.clock() - self._start_time) if self._start_time is not None else 0.0
+        return {
+            "ticks": self.tick_count,
+            "skipped_ticks": self.skipped_ticks,
+            "effective_rate_hz": self.tick_count / elapsed if elapsed > 0 else 0.0,
+            "target_rate_hz": 1.0 / self.period,
+            "last_lateness_ms": self.last_lateness * 1000.0,
+            "mean_lateness_ms": (self._lateness_sum / self.tick_count * 1000.0) if self.tick_count else 0.0,
+            "max_lateness_ms": self.max_lateness * 1000.0,
+        }
@@ -7,10 +7,20 @@ import math
 import time
 import random
 import os
+import functools
 from utils import *
 from networking_utils import Utilities
 from parameter_registry_ import PARAMETER_REGISTRY
 from validation_utils import validate_parameter, get_parameter_config_key
+from control_scheduler import FixedRateScheduler
+from latency_monitor import LatencyMonitor
+from prediction_mailbox import LatestValueMailbox
+from motor_io_worker import MotorIOWorker
+from status_poller import MotorStatusPoller
+from command_dedup import DedupMotorController
+from ring_logger import log
+from telemetry_recorder import TelemetryRecorder
+from udp_replay import DatagramCapture
 
 # ---------------------- Test Mode / Motor Controller ----------------------
 TEST_MODE = True  # True for MockMotorController, False for real hardware
@@ -24,11 +34,24 @@ else:
 
 # ---------------------- UDP Protocol ----------------------
 class UDPProtocol(asyncio.DatagramProtocol):
-    def __init__(self, message_handler):
+    def __init__(self, message_handler, timestamped=False, tap=None):
         self.message_handler = message_handler
+        self.timestamped = timestamped  # pass arrival time to handler for latency tracking
+        self.tap = tap  # optional callable(data), e.g. capture for later replay
 
     def datagram_received(self, data, addr):
-        asyncio.create_task(self.message_handler(data, addr))
+        if self.tap is not None:
+            self.tap(data)
+        if not asyncio.iscoroutinefunction(self.message_handler):
+            # Synchronous handlers run inline, no task per datagram
+            if self.timestamped:
+                self.message_handler(data, addr, time.perf_counter())
+            else:
+                self.message_handler(data, addr)
+        elif self.timestamped:
+            asyncio.create_task(self.message_handler(data, addr, time.perf_counter()))
+        else:
+            asyncio.create_task(self.message_handler(data, addr))
 
 # ---------------------- WristExoController ----------------------
 class WristExoController:
@@ -46,6 +69,21 @@ class WristExoController:
         self.config = self.safety_config
         self.dynamic_config = self.initialize_dynamic_config()
 
+        # Hot-path logging goes through the ring buffer logger
+        log.configure(level=self.config.get("log_level", "INFO"),
+                      enabled=self.config.get("log_enabled", True))
+
+        # Suppress target writes that repeat the last value (periodic keep-alive refresh)
+        if self.config.get("command_dedup", True):
+            self.mc = DedupMotorController(
+                motor_controller,
+                epsilon=self.config.get("command_epsilon", 5e-4),
+                keepalive_period=self.config.get("command_keepalive", 0.5)
+            )
+        # All control-loop motor commands go through one dedicated I/O thread
+        self.motor_io = MotorIOWorker(self.mc)
+        self.motor_io.start()
+
         # Motor mapping
         self.extendingMotorNo = self.config["extendingMotorNo"]
         self.flexingMotorNo = self.config["flexingMotorNo"]
@@ -73,6 +111,38 @@ class WristExoController:
         
         self.control_period = self.config["control_period"]
 
+        # Motor status snapshot sampled in the background (0 disables polling)
+        poll_rate = self.config.get("status_poll_rate_hz", 100.0)
+        self.status_poller = MotorStatusPoller(self.mc, rate_hz=poll_rate) if poll_rate > 0 else None
+        self.scheduler = FixedRateScheduler(
+            self.control_period,
+            overrun_policy=self.config.get("overrun_policy", "skip"),
+            max_catch_up=self.config.get("max_catch_up_ticks", 3)
+        )
+        self.latency = LatencyMonitor(
+            capacity=self.config.get("latency_window", 2048),
+            enabled=self.config.get("latency_monitor", True)
+        )
+        self.prediction_rx_time = None  # arrival time of the prediction not yet sent to the motors
+
+        # Prediction ingestion: "mailbox" decodes datagrams inline into a latest-wins
+        # slot read by the control loop, "task" spawns one task per datagram (legacy)
+        self.prediction_ingestion = self.config.get("prediction_ingestion", "mailbox")
+        self.prediction_mailbox = LatestValueMailbox()
+
+        # Per-tick binary telemetry (disabled when telemetry_path is empty)
+        self.telemetry = None
+        self.telemetry_status_rows = None  # poller rows of [extension, flexion] motor
+        if self.status_poller is not None:
+            rows = self.status_poller.rows
+            if self.extendingMotorNo in rows and self.flexingMotorNo in rows:
+                self.telemetry_status_rows = [rows[self.extendingMotorNo], rows[self.flexingMotorNo]]
+        telemetry_path = self.config.get("telemetry_path", "")
+        if telemetry_path:
+            telemetry_path = time.strftime(telemetry_path)  # allows e.g. "session_%Y%m%d_%H%M%S.tlm"
+            self.telemetry = TelemetryRecorder(telemetry_path)
+            print(f"Recording telemetry to {telemetry_path}")
+
         # Calibration CSV placeholders
         self.calib = None
         self.rest_ext = 0.0
@@ -80,6 +150,7 @@ class WristExoController:
         #self.load_calibration("wrist_recordings.csv")
 
         # Internal state
+        self.current_prediction = None
         self.current_mov = None
         self.current_strength = 0.0
         self.last_mov = None
@@ -90,6 +161,7 @@ class WristExoController:
         
         # Removed torque-related variables
         self.udp_sessions = {}
+        self.udp_capture = None  # DatagramCapture, opened in start() when udp_capture_path is set
         self.loop = asyncio.get_event_loop()
 
     def initialize_dynamic_config(self):
@@ -184,26 +256,85 @@ class WristExoController:
         return  mov, strength
 
     # ---------------------- Simple wrist exo controller ----------------------
-    async def simple_wrist_exo_controller(self, data, addr):
+    async def simple_wrist_exo_controller(self, data, addr, rx_time=None):
         try:
+            t = self.latency.mark("receive", rx_time)
             message = simpleDecodeiMBlocksDoubleMessage(data)
+            t = self.latency.mark("decode", t)
             if message and hasattr(message, 'values') and len(message.values) == 4:
                 pred = list(message.values)
                 # Mapping Prediction from android to target hand positon
                 mov, strength = self.map_prediction_to_targets(pred)
+                self.latency.mark("map", t)
                 self.current_mov = mov
                 self.current_strength = strength
-                print(f"EMG: {mov} (strength: {strength:.3f})")
+                self.current_prediction = pred
+                self.prediction_rx_time = rx_time
+                log.info("EMG: {} (strength: {:.3f})", mov, strength, interval=0.5)
             else:
-                print(f"Invalid prediction data: {data}")
+                log.warning("Invalid prediction data: {}", data, interval=1.0)
         except Exception as e:
-            print(f"Error in controller: {e}")
+            log.error("Error in controller: {}", e, interval=1.0)
         await asyncio.sleep(self.control_period)
 
+    # ---------------------- Mailbox prediction ingestion ----------------------
+    def ingest_prediction(self, data, addr, rx_time=None):
+        """Decode a prediction datagram inline and post it to the mailbox"""
+        t = self.latency.mark("receive", rx_time)
+        message = simpleDecodeiMBlocksDoubleMessage(data)
+        self.latency.mark("decode", t)
+        if message and hasattr(message, 'values') and len(message.values) == 4:
+            self.prediction_mailbox.post(message.values, rx_time)
+        else:
+            self.prediction_mailbox.drop()
+
+    def consume_prediction(self):
+        """Apply the newest mailbox prediction (if any) to the movement state"""
+        item = self.prediction_mailbox.take()
+        if item is None:
+            return
+        values, rx_time = item
+        t = self.latency.now()
+        try:
+            mov, strength = self.map_prediction_to_targets(values)
+        except Exception as e:
+            log.error("Error in controller: {}", e, interval=1.0)
+            return
+        self.latency.mark("map", t)
+        self.current_mov = mov
+        self.current_strength = strength
+        self.current_prediction = values
+        self.prediction_rx_time = rx_time
+
+    # ---------------------- Motor status ----------------------
+    def get_motor_status(self, motor_no):
+        """Latest motor status, from the poller snapshot when polling is enabled"""
+        if self.status_poller is not None:
+            return self.status_poller.get_motor_status(motor_no)
+        return self.mc.get_motor_status(motor_no)
+
+    def status_age(self):
+        """Age of the status snapshot in seconds (0 when reading the bus directly)"""
+        return self.status_poller.age() if self.status_poller is not None else 0.0
+
     # ---------------------- Motor & UDP setup ----------------------
-    async def start_udp_client(self, port, handler):
+    def port_handlers(self):
+        """UDP port -> (handler, timestamped) for every socket the controller listens on"""
+        if self.prediction_ingestion == "mailbox":
+            prediction_handler = self.ingest_prediction
+        else:
+            prediction_handler = self.simple_wrist_exo_controller
+        return {
+            self.motor_settings_port: (self.handle_motor_settings, False),
+            self.start_signal_port: (self.handle_start_signal, False),
+            self.disconnect_port: (self.handle_disconnect_signal, False),
+            self.myo_reg_val_port: (prediction_handler, True),
+        }
+
+    async def start_udp_client(self, port, handler, timestamped=False):
+        tap = functools.partial(self.udp_capture.write, port) if self.udp_capture is not None else None
         transport, protocol = await self.loop.create_datagram_endpoint(
-            lambda: UDPProtocol(handler),
+            lambda: UDPProtocol(handler, timestamped, tap),
             local_addr=('0.0.0.0', port)
         )
         self.udp_sessions[port] = (transport, protocol)
@@ -258,7 +389,21 @@ class WristExoController:
     async def handle_start_signal(self, data, addr):
         try:
             message = json.loads(data.decode('utf-8'))
-            if message.get("command") == "start":
+            if message.get("command") == "latency_report":
+                # Dump the latency histograms on request and send them back as JSON
+                self.latency.dump()
+                report = json.dumps({"status": "success", "latency_ms": self.latency.report(),
+                                     "scheduler": self.scheduler.get_stats(),
+                                     "mailbox": self.prediction_mailbox.get_stats(),
+                                     "motor_io": self.motor_io.get_stats(),
+                                     "dedup": self.mc.get_stats() if isinstance(self.mc, DedupMotorController) else None,
+                                     "status_age_ms": self.status_age() * 1000.0}).encode('utf-8')
+                udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                try:
+                    udp_socket.sendto(report, (addr[0], self.confirmation_port))
+                finally:
+                    udp_socket.close()
+            elif message.get("command") == "start":
                 self.system_initialized = True
                 self.motors_connected = True
                 print("System started")
@@ -283,14 +428,10 @@ class WristExoController:
                 self.motors_connected = False
                 
                 # Stop motors by setting target position to 0
-                await self.loop.run_in_executor(
-                    None, 
-                    lambda: self.mc.set_target_position(self.extendingMotorNo, 0.0)
-                )
-                await self.loop.run_in_executor(
-                    None, 
-                    lambda: self.mc.set_target_position(self.flexingMotorNo, 0.0)
-                )
+                await asyncio.wrap_future(self.motor_io.submit_targets({
+                    self.extendingMotorNo: 0.0,
+                    self.flexingMotorNo: 0.0
+                }))
                 
                 # Reset internal state
                 self.current_mov = 'rest'
@@ -299,6 +440,8 @@ class WristExoController:
                 self.target_position_flex = 0.0
                 self.smoothed_position_ext = 0.0
                 self.smoothed_position_flex = 0.0
+                self.prediction_rx_time = None
+                self.prediction_mailbox.clear()
                 
                 print("Motors disconnected and stopped")
                 
@@ -410,15 +553,19 @@ class WristExoController:
     async def motorControlWithEmgResult(self):
         """Main EMG-controlled position assistance function"""
         print("Running EMG-controlled position assistance with Android safety parameters")
-        
+        self.scheduler.reset()
+
         while True:
-            
+            # Sleep until the next absolute deadline (fixed rate, no drift)
+            await self.scheduler.wait_next()
+
             if not self.motors_connected:
-                await asyncio.sleep(self.control_period) # optional already applying self.control_period later
                 continue
 
+            if self.prediction_ingestion == "mailbox":
+                self.consume_prediction()
 
-
+            tick_start = self.latency.now()
             current_mov = getattr(self, 'current_mov', 'rest')
             raw_strength = getattr(self, 'current_strength', 0.0)
             
@@ -448,34 +595,57 @@ class WristExoController:
             # Apply position limits for safety
             final_ext = max(min(self.smoothed_position_ext, self.upper_position_limit), self.lower_position_limit)
             final_flex = max(min(self.smoothed_position_flex, self.upper_position_limit), self.lower_position_limit)
-            
-            # Send position commands to motors
-            await self.loop.run_in_executor(
-                None, 
-                lambda: self.mc.set_target_position(self.extendingMotorNo, final_ext)
-            )
-            await self.loop.run_in_executor(
-                None, 
-                lambda: self.mc.set_target_position(self.flexingMotorNo, final_flex)
-            )
-            
-            # Logging
-            if current_mov != getattr(self, 'last_mov', None) or effective_strength > 0:
-                print(f"Movement: {current_mov.upper():10} | Strength: {effective_strength:.2f} | "
-                    f"Position: [{final_ext:.2f}, {final_flex:.2f}] rad")
+            t = self.latency.mark("smoothing", tick_start)
+
+            # Hand both position commands to the motor I/O thread (non-blocking,
+            # replaces a previous command that has not been sent yet)
+            self.motor_io.submit_targets({
+                self.extendingMotorNo: final_ext,
+                self.flexingMotorNo: final_flex
+            })
+            self.latency.mark("dispatch", t)
+            if self.prediction_rx_time is not None:
+                # First command issued for this prediction: close the end-to-end span
+                self.latency.mark("end_to_end", self.prediction_rx_time)
+                self.prediction_rx_time = None
+
+            if self.telemetry is not None:
+                status = None
+                if self.telemetry_status_rows is not None:
+                    status = self.status_poller.snapshot()[0][self.telemetry_status_rows]
+                self.telemetry.append(
+                    time.monotonic(), current_mov, self.current_prediction, effective_strength,
+                    (self.smoothed_position_ext, self.smoothed_position_flex),
+                    (final_ext, final_flex), status
+                )
+
+            # Logging (movement changes always, ongoing movement rate-limited)
+            if current_mov != getattr(self, 'last_mov', None):
+                log.info("Movement: {:10} | Strength: {:.2f} | Position: [{:.2f}, {:.2f}] rad",
+                         current_mov.upper(), effective_strength, final_ext, final_flex)
                 self.last_mov = current_mov
-            
-            await asyncio.sleep(self.control_period)
+            elif effective_strength > 0:
+                log.info("Movement: {:10} | Strength: {:.2f} | Position: [{:.2f}, {:.2f}] rad",
+                         current_mov.upper(), effective_strength, final_ext, final_flex, interval=0.25)
 
     # ---------------------- Start Controller ----------------------
     async def start(self):
       
         
         
+        if self.status_poller is not None:
+            self.status_poller.start()
+
+        # Capture incoming datagrams for replay with udp_replay.py
+        capture_path = self.config.get("udp_capture_path", "")
+        if capture_path:
+            self.udp_capture = DatagramCapture(time.strftime(capture_path))
+            print(f"Capturing UDP traffic to {self.udp_capture.path}")
+
+        handlers = self.port_handlers()
         print(f"Listening on ports: {self.motor_settings_port}, {self.start_signal_port}, {self.myo_reg_val_port}")
-        await self.start_udp_client(self.motor_settings_port, self.handle_motor_settings)
-        await self.start_udp_client(self.start_signal_port, self.handle_start_signal)
-        await self.start_udp_client(self.disconnect_port, self.handle_disconnect_signal)  
+        for port in (self.motor_settings_port, self.start_signal_port, self.disconnect_port):
+            await self.start_udp_client(port, *handlers[port])
 
         # Wait for motor settings & start signal
         while not self.motor_settings_received:
@@ -484,21 +654,52 @@ class WristExoController:
             await asyncio.sleep(0.1)
 
         # Start UDP listeners
-        await self.start_udp_client(self.myo_reg_val_port, self.simple_wrist_exo_controller)
+        await self.start_udp_client(self.myo_reg_val_port, *handlers[self.myo_reg_val_port])
+        self.start_control_tasks()
+        
+        print("Controller fully initialized and running")
+
+    def start_control_tasks(self):
         # Start motor control task
         asyncio.create_task(self.motorControlWithEmgResult())
         # Start master control loop
         asyncio.create_task(self.master_control_loop())
-        
-        print("Controller fully initialized and running")
 
     def cleanup(self):
         self.stop_udp_client()
+        if self.udp_capture is not None:
+            self.udp_capture.close()
+            print(f"UDP capture: {self.udp_capture.count} datagrams saved to {self.udp_capture.path}")
+        if self.status_poller is not None:
+            self.status_poller.stop()
+        self.motor_io.stop()
+        if self.telemetry is not None:
+            self.telemetry.close()
+            print(f"Telemetry: {self.telemetry.count} ticks saved to {self.telemetry.path}")
+        io = self.motor_io.get_stats()
+        print(f"Motor I/O: {io['executed']} executed, {io['coalesced']} coalesced, {io['rejected']} rejected, "
+              f"max depth {io['max_queue_depth']}, service p95 {io['service_time_ms']['p95']:.3f} ms")
+        if isinstance(self.mc, DedupMotorController):
+            dd = self.mc.get_stats()
+            print(f"Command dedup: {dd['sent']} sent, {dd['suppressed']} suppressed, {dd['keepalives']} keep-alives")
+        stats = self.scheduler.get_stats()
+        print(f"Control loop: {stats['ticks']} ticks, {stats['effective_rate_hz']:.1f}/{stats['target_rate_hz']:.1f} Hz, "
+              f"skipped {stats['skipped_ticks']}, lateness mean {stats['mean_lateness_ms']:.2f} ms, "
+              f"max {stats['max_lateness_ms']:.2f} ms")
+        if self.prediction_ingestion == "mailbox":
+            mb = self.prediction_mailbox.get_stats()
+            print(f"Prediction mailbox: {mb['posted']} posted, {mb['taken']} taken, "
+                  f"{mb['superseded']} superseded, {mb['dropped']} dropped")
+        if self.latency.enabled:
+            self.latency.dump()
         if not TEST_MODE:
             try:
                 self.mc.candle.end()
             except:
                 pass
+        lg = log.get_stats()
+        print(f"Logger: {lg['flushed']} flushed, {lg['dropped']} dropped, {lg['rate_limited']} rate-limited")
+        log.close()
         print("Controller cleaned up.")
 
     
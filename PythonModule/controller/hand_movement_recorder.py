@@ -7,6 +7,7 @@ import pyCandle
 import atexit
 import sys
 import threading
+from status_poller import MotorStatusPoller
 
 # --- CONFIGURATION ---
 USE_MOCK = False
@@ -14,6 +15,7 @@ USE_MOCK = False
 SOFT_CONTROL_MODE = pyCandle.RAW_TORQUE 
 SOFT_TORQUE_LIMIT = 0.05  # Lowest possible max torque
 SOFT_MODE_LOOP_SLEEP = 0.01  
+STATUS_POLL_RATE_HZ = 200  # background status sampling, faster than the 100 Hz recording
 
 # Globals for motor control and threading
 running_soft_mode = False
@@ -39,6 +41,8 @@ try:
     mc.set_only_motor_mode(1, SOFT_CONTROL_MODE)  
 
     mc.candle.begin()
+    # Both motors are read in one batched call per poll instead of two reads per sample
+    status_poller = MotorStatusPoller(mc, rate_hz=STATUS_POLL_RATE_HZ, motor_nos=(0, 1))
 except Exception as e:
     sys.exit(f"Failed to initialize CANdle/MotorController: {e}")
 
@@ -91,6 +95,7 @@ def shutdown_all_motors(soft_thread=None):
     running_soft_mode = False
     if soft_thread and soft_thread.is_alive():
         soft_thread.join()
+    status_poller.stop()
 
     # 2. RESTORE ORIGINAL MAX TORQUE LIMITS
     if original_max_torque_0 is not None:
@@ -114,6 +119,7 @@ def shutdown_all_motors(soft_thread=None):
 
 # 1. Setup the soft mode thread and register shutdown
 soft_thread = soft_release_and_start_thread()
+status_poller.start()
 atexit.register(lambda: shutdown_all_motors(soft_thread))
 
 # ---------- Movement Recording ----------
@@ -140,8 +146,9 @@ try:
             # --- THE RECORDING LOOP ---
             while time.time() - start_time < record_time:
                 timestamp = time.time()
-                ext_pos = mc.get_motor_status(0)["position"]
-                flex_pos = mc.get_motor_status(1)["position"]
+                statuses, _ = status_poller.snapshot()
+                ext_pos = statuses[0, 0]
+                flex_pos = statuses[1, 0]
                 writer.writerow([timestamp, mov, ext_pos, flex_pos])
                 time.sleep(sample_period)
             # --- END RECORDING LOOP ---
@@ -0,0 +1,71 @@
+# latency_monitor.py
+# Per-stage latency instrumentation for the prediction -> motor command path.
+# Each stage keeps a fixed-size rolling window of samples. Samples are written
+# by a single producer (the event loop) without locks; readers take a copy.
+import time
+import numpy as np
+
+# Stages in pipeline order. "end_to_end" spans datagram arrival to the motor
+# command dispatch of the first control tick that used that prediction.
+LATENCY_STAGES = ("receive", "decode", "map", "smoothing", "dispatch", "end_to_end")
+
+
+class RollingHistogram:
+    def __init__(self, capacity=2048):
+        self.samples = np.zeros(capacity, dtype=np.float64)
+        self.capacity = capacity
+        self.count = 0  # total samples ever written
+
+    def add(self, value):
+        # Write the slot first, then publish by bumping the counter
+        self.samples[self.count % self.capacity] = value
+        self.count += 1
+
+    def values(self):
+        n = min(self.count, self.capacity)
+        return self.samples[:n].copy()
+
+    def summary(self, scale=1000.0):
+        """Return count/p50/p95/p99/max of the window, scaled (default: ms)."""
+        vals = self.values()
+        if vals.size == 0:
+            return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        p50, p95, p99 = np.percentile(vals, (50, 95, 99)) * scale
+        return {
+            "count": self.count,
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+            "max": float(vals.max() * scale),
+        }
+
+
+class LatencyMonitor:
+    def __init__(self, capacity=2048, enabled=True, stages=LATENCY_STAGES, clock=time.perf_counter):
+        self.enabled = enabled
+        self.clock = clock
+        self.histograms = {stage: RollingHistogram(capacity) for stage in stages}
+
+    def now(self):
+        return self.clock()
+
+    def record(self, stage, seconds):
+        if self.enabled:
+            self.histograms[stage].add(seconds)
+
+    def mark(self, stage, start_time):
+        """Record the time since start_time under stage and return the current time."""
+        now = self.clock()
+        if self.enabled and start_time is not None:
+            self.histograms[stage].add(now - start_time)
+        return now
+
+    def report(self):
+        """Return {stage: {count, p50, p95, p99, max}} with times in milliseconds."""
+        return {stage: hist.summary() for stage, hist in self.histograms.items()}
+
+    def dump(self):
+        print(f"{'Stage':>12} | {'Count':>7} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'max ms':>8}")
+        print("-" * 66)
+        for stage, s in self.report().items():
+            print(f"{stage:>12} | {s['count']:>7} | {s['p50']:>8.3f} | {s['p95']:>8.3f} | {s['p99']:>8.3f} | {s['max']:>8.3f}")
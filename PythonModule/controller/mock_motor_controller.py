@@ -1,23 +1,31 @@
 # mock_motor_controller.py
+import random
+import numpy as np
+from ring_logger import log
+
+# Column layout of the array returned by get_motor_statuses (same as MotorController)
+STATUS_FIELDS = ("position", "velocity", "torque")
+
 class MockMotorController:
-    def __init__(self):
+    def __init__(self, num_motors=2):
         print("Initializing Mock Motor Controller")
-        self.md80s = [MockMd80(0), MockMd80(1)]  # Two mock motors
+        self.md80s = [MockMd80(i) for i in range(num_motors)]  # Two mock motors by default
         self.candle = MockCandle()
+        self.motors = tuple(self.md80s)
+        self.all_motor_nos = tuple(range(len(self.motors)))
         
     def set_only_motor_mode(self, motor_no, mode):
-        print(f"Mock: Setting motor {motor_no} to mode {mode}")
+        log.debug("Mock: Setting motor {} to mode {}", motor_no, mode)
         
     def set_impedance_controller_params(self, motor_no, kp, kd):
-        print(f"Mock: Setting motor {motor_no} impedance params: kp={kp}, kd={kd}")
+        log.debug("Mock: Setting motor {} impedance params: kp={}, kd={}", motor_no, kp, kd)
         
     def set_target_torque(self, motor_no, torque):
-        print(f"Mock: Setting motor {motor_no} target torque: {torque}")
+        log.debug("Mock: Setting motor {} target torque: {}", motor_no, torque)
         
     def get_motor_status(self, motor_no):
         # Return mock status with some variation
-        import random
-        print(f"Mock: get_motor_status gets called  ")
+        log.debug("Mock: get_motor_status gets called  ")
         return {
             "position": random.uniform(-0.5, 0.5),
             "velocity": random.uniform(-0.1, 0.1),
@@ -25,24 +33,45 @@ class MockMotorController:
         }
         
     def blink(self, motor_no):
-        print(f"Mock: Blinking motor {motor_no}")
+        log.debug("Mock: Blinking motor {}", motor_no)
         
     def set_target_position(self, motor_no, position):
-        print(f"Mock: Setting motor {motor_no} target position: {position}")
+        log.debug("Mock: Setting motor {} target position: {}", motor_no, position)
         
     def set_target_velocity(self, motor_no, velocity):
-        print(f"Mock: Setting motor {motor_no} target velocity: {velocity}")
+        log.debug("Mock: Setting motor {} target velocity: {}", motor_no, velocity)
         
     def set_velocity_controller_params(self, motor_no, kp, ki, kd, iWindup):
-        print(f"Mock: Setting motor {motor_no} velocity controller params: kp={kp}, ki={ki}, kd={kd}, iWindup={iWindup}")
+        log.debug("Mock: Setting motor {} velocity controller params: kp={}, ki={}, kd={}, iWindup={}", motor_no, kp, ki, kd, iWindup)
         
     def set_position_controller_params(self, motor_no, kp, ki, kd, iWindup):
-        print(f"Mock: Setting motor {motor_no} position controller params: kp={kp}, ki={ki}, kd={kd}, iWindup={iWindup}")
+        log.debug("Mock: Setting motor {} position controller params: kp={}, ki={}, kd={}, iWindup={}", motor_no, kp, ki, kd, iWindup)
         
     def set_max_torque(self, motor_no, max_torque):
-        print(f"Mock: Setting motor {motor_no} max torque: {max_torque}")
+        log.debug("Mock: Setting motor {} max torque: {}", motor_no, max_torque)
         # Remove the duplicate set_only_motor_mode method that was here
 
+    # ---------------------- Batched multi-motor API ----------------------
+    def set_target_positions(self, motor_nos, positions):
+        log.debug("Mock: Setting motors {} target positions: {}", list(motor_nos), list(positions))
+
+    def set_target_torques(self, motor_nos, torques):
+        log.debug("Mock: Setting motors {} target torques: {}", list(motor_nos), list(torques))
+
+    def set_impedance_controller_params_many(self, motor_nos, kps, kds):
+        log.debug("Mock: Setting motors {} impedance params: kp={}, kd={}", list(motor_nos), list(kps), list(kds))
+
+    def get_motor_statuses(self, motor_nos=None, out=None):
+        if motor_nos is None:
+            motor_nos = self.all_motor_nos
+        if out is None:
+            out = np.empty((len(motor_nos), len(STATUS_FIELDS)), dtype=np.float64)
+        n = len(motor_nos)
+        out[:, 0] = np.random.uniform(-0.5, 0.5, n)
+        out[:, 1] = np.random.uniform(-0.1, 0.1, n)
+        out[:, 2] = np.random.uniform(-0.5, 0.5, n)
+        return out
+
 class MockMd80:
     def __init__(self, motor_id):
         self.motor_id = motor_id
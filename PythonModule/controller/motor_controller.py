@@ -1,6 +1,11 @@
 # motor_controller.py
 import pyCandle
 import sys
+import numpy as np
+from ring_logger import log
+
+# Column layout of the array returned by get_motor_statuses
+STATUS_FIELDS = ("position", "velocity", "torque")
 
 class MotorController:
     def __init__(self, candle, motor_no=0, upper_limit=0, lower_limit=0, kd=0, kp=0, max_torque=0):
@@ -28,6 +33,9 @@ class MotorController:
             sys.exit("No motors found. Exiting.")
         for motor_no in ids:
             self.candle.addMd80(int(motor_no))
+        # Resolve motor handles once; the batched API indexes this tuple directly
+        self.motors = tuple(self.candle.md80s)
+        self.all_motor_nos = tuple(range(len(self.motors)))
 
     def set_motor_mode(self, motor_no, mode):
         motor = self.candle.md80s[motor_no]
@@ -106,9 +114,44 @@ class MotorController:
 
     def set_target_torque(self, motor_no, torque): # should be torque FF (feed forward) since it does not set the final torque output
         motor = self.candle.md80s[int(motor_no)]
-        print(f"[DEBUG] Actually sending torque {torque} to motor {motor_no}")
+        log.debug("Actually sending torque {} to motor {}", torque, motor_no)
         motor.setTargetTorque(torque)
 
     def blink(self, motor_no):
         motor = self.candle.md80s[int(motor_no)]
         self.candle.configMd80Blink(motor.getId())
+
+    # ---------------------- Batched multi-motor API ----------------------
+    # motor_nos is a sequence of indices into self.motors; values are matched by position.
+
+    def set_target_positions(self, motor_nos, positions):
+        motors = self.motors
+        for motor_no, position in zip(motor_nos, positions):
+            motors[motor_no].setTargetPosition(float(position))
+
+    def set_target_torques(self, motor_nos, torques):
+        motors = self.motors
+        for motor_no, torque in zip(motor_nos, torques):
+            motors[motor_no].setTargetTorque(float(torque))
+
+    def set_impedance_controller_params_many(self, motor_nos, kps, kds):
+        motors = self.motors
+        for motor_no, kp, kd in zip(motor_nos, kps, kds):
+            motors[motor_no].setImpedanceControllerParams(float(kp), float(kd))
+
+    def get_motor_statuses(self, motor_nos=None, out=None):
+        """
+        Return an (n, 3) float array of [position, velocity, torque] rows, one per
+        motor in motor_nos (default: all motors). Pass out to fill an existing array.
+        """
+        if motor_nos is None:
+            motor_nos = self.all_motor_nos
+        if out is None:
+            out = np.empty((len(motor_nos), len(STATUS_FIELDS)), dtype=np.float64)
+        motors = self.motors
+        for row, motor_no in enumerate(motor_nos):
+            motor = motors[motor_no]
+            out[row, 0] = motor.getPosition() or 0.0
+            out[row, 1] = motor.getVelocity() or 0.0
+            out[row, 2] = motor.getTorque() or 0.0
+        return out
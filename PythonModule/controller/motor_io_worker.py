@@ -0,0 +1,142 @@
+# motor_io_worker.py
+# Single long-lived thread that owns all pyCandle command calls issued by the
+# control loop. Commands go through a small bounded queue; a new "targets for
+# all motors" command replaces any targets command still waiting, so the
+# motors always get the newest setpoint and calls never pile up.
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from latency_monitor import RollingHistogram
+
+TARGETS_COMMAND = "targets"
+CALL_COMMAND = "call"
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class MotorIOWorker:
+    def __init__(self, motor_controller, max_pending=8, stats_window=2048):
+        self.mc = motor_controller
+        self.max_pending = max_pending
+
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        # Statistics
+        self.submitted = 0
+        self.coalesced = 0      # pending targets commands replaced by a newer one
+        self.rejected = 0       # commands refused because the queue was full
+        self.executed = 0
+        self.errors = 0
+        self.max_depth = 0
+        self.service_time = RollingHistogram(stats_window)
+        self.queue_delay = RollingHistogram(stats_window)
+
+    # ---------------------- Lifecycle ----------------------
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="motor-io", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop after draining commands that are already queued."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ---------------------- Submission ----------------------
+    def submit_targets(self, targets):
+        """
+        Queue a combined position command {motor_no: position}. A targets
+        command that has not been picked up yet is replaced by this one.
+        Returns a Future resolving to True when sent, False if superseded.
+        """
+        future = Future()
+        with self._cond:
+            self.submitted += 1
+            for cmd in self._pending:
+                if cmd[0] == TARGETS_COMMAND:
+                    cmd[2].set_result(False)
+                    cmd[1] = dict(targets)
+                    cmd[2] = future
+                    cmd[3] = time.perf_counter()
+                    self.coalesced += 1
+                    return future
+            return self._enqueue([TARGETS_COMMAND, dict(targets), future, time.perf_counter()])
+
+    def submit(self, fn, *args):
+        """Queue an arbitrary motor controller call (FIFO, not coalesced)."""
+        future = Future()
+        with self._cond:
+            self.submitted += 1
+            return self._enqueue([CALL_COMMAND, (fn, args), future, time.perf_counter()])
+
+    def _enqueue(self, cmd):
+        future = cmd[2]
+        if len(self._pending) >= self.max_pending:
+            self.rejected += 1
+            future.set_exception(QueueFullError("Motor I/O queue is full"))
+            return future
+        self._pending.append(cmd)
+        depth = len(self._pending)
+        if depth > self.max_depth:
+            self.max_depth = depth
+        self._cond.notify()
+        return future
+
+    # ---------------------- Worker ----------------------
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._pending:
+                    return  # stopped and drained
+                kind, payload, future, enqueued_at = self._pending.popleft()
+
+            start = time.perf_counter()
+            self.queue_delay.add(start - enqueued_at)
+            try:
+                if kind == TARGETS_COMMAND:
+                    self._send_targets(payload)
+                    result = True
+                else:
+                    fn, args = payload
+                    result = fn(*args)
+                future.set_result(result)
+            except Exception as e:
+                self.errors += 1
+                future.set_exception(e)
+            self.executed += 1
+            self.service_time.add(time.perf_counter() - start)
+
+    def _send_targets(self, targets):
+        # One batched call commands every motor at (nearly) the same instant
+        self.mc.set_target_positions(tuple(targets.keys()), tuple(targets.values()))
+
+    def queue_depth(self):
+        return len(self._pending)
+
+    def get_stats(self):
+        return {
+            "submitted": self.submitted,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "queue_depth": self.queue_depth(),
+            "max_queue_depth": self.max_depth,
+            "queue_delay_ms": self.queue_delay.summary(),
+            "service_time_ms": self.service_time.summary(),
+        }
@@ -0,0 +1,52 @@
+# prediction_mailbox.py
+# Single-slot, latest-wins mailbox between the prediction socket and the
+# control loop. The producer overwrites the slot, the control loop takes the
+# newest value once per tick. Both sides run on the event loop thread.
+
+
+class LatestValueMailbox:
+    def __init__(self):
+        self._value = None
+        self._timestamp = None
+        self._fresh = False
+
+        # Backpressure counters
+        self.posted = 0       # valid values written
+        self.taken = 0        # values consumed by the reader
+        self.superseded = 0   # values overwritten before the reader saw them
+        self.dropped = 0      # invalid / undecodable inputs rejected
+
+    def post(self, value, timestamp=None):
+        if self._fresh:
+            self.superseded += 1
+        self._value = value
+        self._timestamp = timestamp
+        self._fresh = True
+        self.posted += 1
+
+    def drop(self):
+        self.dropped += 1
+
+    def take(self):
+        """Return (value, timestamp) of the newest unread value, or None."""
+        if not self._fresh:
+            return None
+        self._fresh = False
+        self.taken += 1
+        return self._value, self._timestamp
+
+    def peek(self):
+        return self._value
+
+    def clear(self):
+        self._value = None
+        self._timestamp = None
+        self._fresh = False
+
+    def get_stats(self):
+        return {
+            "posted": self.posted,
+            "taken": self.taken,
+            "superseded": self.superseded,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,185 @@
+# ring_logger.py
+# Non-blocking logger for the control hot path. Callers only write the format
+# string and its arguments into a preallocated ring buffer; formatting and the
+# actual (possibly slow) console write happen on a background flush thread.
+#
+#   from ring_logger import log
+#   log.info("EMG: {} (strength: {:.3f})", mov, strength, interval=0.5)
+import atexit
+import itertools
+import sys
+import threading
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR, "OFF": OFF}
+
+
+class RingLogger:
+    def __init__(self, capacity=1024, level=INFO, enabled=True, flush_interval=0.05, stream=None):
+        self.capacity = capacity
+        self.level = level
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.stream = stream
+
+        # Slot layout: [seq, time, level, fmt, args]; seq is written last to publish
+        self._ring = [[-1, 0.0, 0, "", ()] for _ in range(capacity)]
+        self._counter = itertools.count()
+        self._read_idx = 0
+
+        # Rate limiting / sampling state, keyed by format string
+        self._last_emit = {}
+        self._suppressed = {}   # counts of interval-limited records; guarded by _flush_lock
+        self._sample_count = {}
+
+        self.dropped = 0        # records overwritten before they were flushed
+        self.rate_limited = 0   # records skipped by interval / sample limits
+
+        self._flush_lock = threading.Lock()  # ring read side and _suppressed
+        self._write_lock = threading.Lock()  # keeps flushes in order on the stream
+        self._thread = None
+        self._stop = threading.Event()
+
+    def configure(self, level=None, enabled=None, flush_interval=None):
+        if level is not None:
+            self.level = LEVEL_NAMES[level.upper()] if isinstance(level, str) else level
+        if enabled is not None:
+            self.enabled = enabled
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+
+    # ---------------------- Producers (hot path) ----------------------
+    def log(self, level, fmt, *args, interval=None, sample=None):
+        """
+        Queue a record. fmt uses str.format placeholders and is formatted later.
+        interval: emit at most once per interval seconds for this fmt.
+        sample: emit only every sample-th call for this fmt.
+        """
+        if not self.enabled or level < self.level:
+            return
+        if interval is not None or sample is not None:
+            if not self._admit(fmt, interval, sample):
+                return
+
+        i = next(self._counter)
+        slot = self._ring[i % self.capacity]
+        slot[1] = time.time()
+        slot[2] = level
+        slot[3] = fmt
+        slot[4] = args
+        slot[0] = i
+
+        if self._thread is None:
+            self._start()
+
+    def _admit(self, fmt, interval, sample):
+        if sample is not None:
+            n = self._sample_count.get(fmt, 0)
+            self._sample_count[fmt] = n + 1
+            if n % sample:
+                self.rate_limited += 1
+                return False
+        if interval is not None:
+            now = time.monotonic()
+            last = self._last_emit.get(fmt)
+            if last is not None and now - last < interval:
+                with self._flush_lock:
+                    self._suppressed[fmt] = self._suppressed.get(fmt, 0) + 1
+                self.rate_limited += 1
+                return False
+            self._last_emit[fmt] = now
+        return True
+
+    def debug(self, fmt, *args, **kwargs):
+        self.log(DEBUG, fmt, *args, **kwargs)
+
+    def info(self, fmt, *args, **kwargs):
+        self.log(INFO, fmt, *args, **kwargs)
+
+    def warning(self, fmt, *args, **kwargs):
+        self.log(WARNING, fmt, *args, **kwargs)
+
+    def error(self, fmt, *args, **kwargs):
+        self.log(ERROR, fmt, *args, **kwargs)
+
+    # ---------------------- Flushing (background) ----------------------
+    def _start(self):
+        with self._flush_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="ring-logger", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """Format and write all published records. Safe to call from any thread."""
+        # The stream write happens outside _flush_lock, so rate-limited producers
+        # never wait on console output
+        with self._write_lock:
+            with self._flush_lock:
+                lines = self._drain()
+            if lines:
+                stream = self.stream or sys.stdout
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+
+    def _drain(self):
+        """Format all published records; called with _flush_lock held."""
+        lines = []
+        while True:
+            slot = self._ring[self._read_idx % self.capacity]
+            seq = slot[0]
+            if seq < self._read_idx:
+                break  # not published yet
+            if seq > self._read_idx:
+                # Writers lapped the reader; skip to the oldest record still in the ring
+                oldest = max(self._read_idx + 1, seq - self.capacity + 1)
+                self.dropped += oldest - self._read_idx
+                self._read_idx = oldest
+                continue
+            _, _, level, fmt, args = slot
+            if slot[0] != seq:
+                continue  # overwritten while reading, re-check this index
+            lines.append(self._format(level, fmt, args))
+            self._read_idx += 1
+        return lines
+
+    def _format(self, level, fmt, args):
+        try:
+            msg = fmt.format(*args) if args else fmt
+        except Exception as e:
+            msg = f"{fmt} {args} (format error: {e})"
+        suppressed = self._suppressed.pop(fmt, 0)
+        if suppressed:
+            msg += f" (+{suppressed} similar suppressed)"
+        if level >= WARNING:
+            msg = ("WARNING: " if level < ERROR else "ERROR: ") + msg
+        return msg
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(1.0)
+        self.flush()
+
+    def get_stats(self):
+        return {
+            "flushed": self._read_idx,
+            "dropped": self.dropped,
+            "rate_limited": self.rate_limited,
+        }
+
+
+# Shared process-wide logger
+log = RingLogger()
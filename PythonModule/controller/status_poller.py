@@ -0,0 +1,94 @@
+# status_poller.py
+# Background poller that samples position, velocity and torque of all motors
+# at a fixed rate into a double-buffered numpy array. Readers get the latest
+# complete snapshot without touching the CAN bus.
+import threading
+import time
+import numpy as np
+
+STATUS_FIELDS = ("position", "velocity", "torque")
+
+
+class MotorStatusPoller:
+    def __init__(self, motor_controller, rate_hz=100.0, motor_nos=None, clock=time.monotonic):
+        if rate_hz <= 0:
+            raise ValueError("Poll rate must be positive")
+        self.mc = motor_controller
+        self.period = 1.0 / rate_hz
+        self.clock = clock
+        if motor_nos is None:
+            motor_nos = motor_controller.all_motor_nos
+        self.motor_nos = tuple(motor_nos)
+        self.rows = {motor_no: row for row, motor_no in enumerate(self.motor_nos)}
+
+        # Two buffers: the writer fills buffers[(seq + 1) & 1] while readers
+        # copy buffers[seq & 1]; bumping seq publishes the new snapshot.
+        self._buffers = np.zeros((2, len(self.motor_nos), len(STATUS_FIELDS)), dtype=np.float64)
+        self._timestamps = [0.0, 0.0]
+        self._seq = 0
+
+        self._running = False
+        self._thread = None
+        self.polls = 0
+        self.errors = 0
+
+    # ---------------------- Lifecycle ----------------------
+    def start(self):
+        if self._running:
+            return
+        self.poll_once()  # readers get a valid snapshot right away
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="status-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        next_deadline = self.clock()
+        while self._running:
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.errors += 1
+                if self.errors == 1:
+                    print(f"Status poller error: {e}")
+            next_deadline += self.period
+            delay = next_deadline - self.clock()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_deadline = self.clock()  # overrun, realign
+
+    def poll_once(self):
+        back = (self._seq + 1) & 1
+        self.mc.get_motor_statuses(self.motor_nos, out=self._buffers[back])
+        self._timestamps[back] = self.clock()
+        self._seq += 1
+        self.polls += 1
+
+    # ---------------------- Readers ----------------------
+    def snapshot(self):
+        """Return (statuses, timestamp): a copy of the latest (n, 3) array and its sample time."""
+        while True:
+            seq = self._seq
+            front = seq & 1
+            data = self._buffers[front].copy()
+            timestamp = self._timestamps[front]
+            # The writer only rewrites buffers[seq & 1] after publishing seq + 1, so an
+            # unchanged seq means the copy and timestamp come from one poll
+            if self._seq == seq:
+                return data, timestamp
+
+    def age(self):
+        """Seconds since the latest snapshot was sampled."""
+        return self.clock() - self._timestamps[self._seq & 1]
+
+    def get_motor_status(self, motor_no):
+        """Drop-in replacement for MotorController.get_motor_status served from the snapshot."""
+        data, _ = self.snapshot()
+        row = data[self.rows[motor_no]]
+        return {"position": float(row[0]), "velocity": float(row[1]), "torque": float(row[2])}
@@ -0,0 +1,135 @@
+# telemetry_recorder.py
+# High-rate binary telemetry for the control loop. Every tick is appended as a
+# fixed-size record to a memory-mapped file that grows in large steps, so a
+# tick costs one structured-array row write and no syscalls or formatting.
+#
+# File layout: 64-byte header followed by packed tick_dtype() records.
+#   header = magic(8s) version(I) record_size(I) record_count(Q) num_status(I) num_predictions(I) pad
+# Target columns are always [extension motor, flexion motor], the two motors the
+# controller drives. motor_status holds num_status rows, also [extension, flexion]
+# as the controller records them.
+#
+#   rec = open_telemetry("session.tlm")      # zero-copy numpy structured array
+#   rec["strength"], rec["final_targets"][:, 0], ...
+import mmap
+import os
+import struct
+import numpy as np
+
+TELEMETRY_MAGIC = b"EXOTLM01"
+TELEMETRY_VERSION = 1
+HEADER_FORMAT = "<8sIIQII"
+HEADER_SIZE = 64
+
+MOVEMENT_CODES = {"isometric": 0, "extension": 1, "flexion": 2, "rest": 3}
+NUM_TARGETS = 2  # extension, flexion
+
+
+def tick_dtype(num_status=2, num_predictions=4):
+    return np.dtype([
+        ("time", "<f8"),                               # monotonic seconds
+        ("movement", "<i1"),                           # MOVEMENT_CODES, -1 = unknown
+        ("prediction", "<f4", (num_predictions,)),     # raw prediction vector from the phone
+        ("strength", "<f4"),
+        ("smoothed_targets", "<f4", (NUM_TARGETS,)),
+        ("final_targets", "<f4", (NUM_TARGETS,)),
+        ("motor_status", "<f4", (num_status, 3)),      # position, velocity, torque
+    ], align=False)
+
+
+class TelemetryRecorder:
+    def __init__(self, path, num_status=2, num_predictions=4, grow_records=65536, header_every=1024):
+        self.path = path
+        self.dtype = tick_dtype(num_status, num_predictions)
+        self.num_status = num_status
+        self.num_predictions = num_predictions
+        self.grow_records = grow_records
+        self.header_every = header_every  # refresh the header count every N records
+        self.count = 0
+
+        self._file = open(path, "w+b")
+        self._file.write(self._pack_header(0).ljust(HEADER_SIZE, b"\0"))
+        self._capacity = 0
+        self._mmap = None
+        self._records = None
+        self._grow()
+
+    def _pack_header(self, count):
+        return struct.pack(HEADER_FORMAT, TELEMETRY_MAGIC, TELEMETRY_VERSION,
+                           self.dtype.itemsize, count, self.num_status, self.num_predictions)
+
+    def _grow(self):
+        """Extend the file by grow_records records and remap it."""
+        self._release()
+        self._capacity += self.grow_records
+        self._file.truncate(HEADER_SIZE + self._capacity * self.dtype.itemsize)
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self._records = np.ndarray((self._capacity,), dtype=self.dtype,
+                                   buffer=self._mmap, offset=HEADER_SIZE)
+
+    def _release(self):
+        if self._mmap is not None:
+            self._records = None
+            self._mmap.close()
+            self._mmap = None
+
+    def append(self, t, movement, prediction, strength, smoothed_targets, final_targets, motor_status=None):
+        if self.count >= self._capacity:
+            self._grow()
+        rec = self._records[self.count]
+        rec["time"] = t
+        rec["movement"] = MOVEMENT_CODES.get(movement, -1)
+        if prediction is not None:
+            rec["prediction"] = prediction
+        rec["strength"] = strength
+        rec["smoothed_targets"] = smoothed_targets
+        rec["final_targets"] = final_targets
+        if motor_status is not None:
+            rec["motor_status"] = motor_status
+        # Count the record only once it is filled, so a flushed header never covers a partial tick
+        self.count += 1
+        if self.count % self.header_every == 0:
+            self._mmap[:struct.calcsize(HEADER_FORMAT)] = self._pack_header(self.count)
+
+    def flush(self):
+        """Persist the record count in the header and sync the mapping."""
+        if self._mmap is None:
+            return
+        self._mmap[:struct.calcsize(HEADER_FORMAT)] = self._pack_header(self.count)
+        self._mmap.flush()
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._release()
+        # Drop the preallocated tail so the file holds exactly the recorded ticks
+        self._file.truncate(HEADER_SIZE + self.count * self.dtype.itemsize)
+        self._file.close()
+        self._file = None
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        raw = f.read(struct.calcsize(HEADER_FORMAT))
+    magic, version, record_size, count, num_status, num_predictions = struct.unpack(HEADER_FORMAT, raw)
+    if magic != TELEMETRY_MAGIC:
+        raise ValueError(f"{path} is not a telemetry file")
+    if version != TELEMETRY_VERSION:
+        raise ValueError(f"Unsupported telemetry version {version}")
+    return {"record_size": record_size, "count": count,
+            "num_status": num_status, "num_predictions": num_predictions}
+
+
+def open_telemetry(path):
+    """Open a recording as a read-only, zero-copy numpy structured array (np.memmap)."""
+    header = read_header(path)
+    dtype = tick_dtype(header["num_status"], header["num_predictions"])
+    if dtype.itemsize != header["record_size"]:
+        raise ValueError("Record size in header does not match the tick layout")
+    # A recording that was not closed cleanly still has its last flushed count
+    available = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+    count = min(header["count"], available)
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
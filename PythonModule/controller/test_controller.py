@@ -76,6 +76,10 @@ async def test_controller():
         # Wait a bit between predictions
         await asyncio.sleep(3)
     
+    # 4. Ask the controller to dump its latency histograms
+    latency_request = json.dumps({'command': 'latency_report'}).encode('utf-8')
+    await send_udp_message(host, start_signal_port, latency_request)
+    
     print("Test sequence completed")
 
 if __name__ == '__main__':
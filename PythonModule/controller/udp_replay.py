@@ -0,0 +1,147 @@
+# udp_replay.py
+# Record-and-replay harness for the controller's UDP traffic.
+#
+# Recording: set "udp_capture_path" in config.json. WristExoController then
+# appends every datagram it receives on the settings, start, disconnect and
+# prediction ports to a capture file, with its arrival time.
+#
+# Replay: feeds a capture into a WristExoController backed by
+# MockMotorController through the same UDPProtocol path the sockets use.
+#   python udp_replay.py replay session.udp --speed 1     # real time
+#   python udp_replay.py replay session.udp --speed 10    # 10x
+#   python udp_replay.py replay session.udp --speed 0     # as fast as possible
+#   python udp_replay.py synth bench.udp --rate 50 --duration 60
+import argparse
+import asyncio
+import json
+import struct
+import time
+
+CAPTURE_MAGIC = b"EXOUDP01"
+RECORD_HEADER = struct.Struct("<dHI")  # arrival offset (s), port, payload length
+
+
+class DatagramCapture:
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = open(path, "wb")
+        self._file.write(CAPTURE_MAGIC)
+        self._t0 = time.monotonic()
+
+    def write(self, port, data):
+        """Append a datagram stamped with its arrival time (now)"""
+        self.write_at(time.monotonic() - self._t0, port, data)
+
+    def write_at(self, offset, port, data):
+        self._file.write(RECORD_HEADER.pack(offset, port, len(data)))
+        self._file.write(data)
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_capture(path):
+    """Return a list of (offset_seconds, port, data) records."""
+    records = []
+    with open(path, "rb") as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a UDP capture file")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                break  # end of file (or truncated last record)
+            t, port, length = RECORD_HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                break
+            records.append((t, port, data))
+    return records
+
+
+def synthesize_capture(path, config, rate_hz=50.0, duration=60.0, seed=0):
+    """Write a capture with a settings/start handshake and cycling predictions."""
+    import random
+    rng = random.Random(seed)
+    cap = DatagramCapture(path)
+    settings = {'positionKp': 8.0, 'positionKd': 0.8, 'movementSpeed': 0.8, 'smoothingFactor': 0.05}
+    cap.write_at(0.0, config["motor_settings_port"], json.dumps(settings).encode('utf-8'))
+    cap.write_at(0.1, config["start_signal_port"], json.dumps({'command': 'start'}).encode('utf-8'))
+    n = int(rate_hz * duration)
+    for i in range(n):
+        cls = (i // int(rate_hz * 2)) % 4  # hold each class for 2 s
+        pred = [rng.uniform(0.0, 0.2) for _ in range(4)]
+        pred[cls] += rng.uniform(0.5, 1.0)
+        cap.write_at(0.2 + i / rate_hz, config["myo_reg_val_port"], struct.pack('<4d', *pred))
+    cap.close()
+    print(f"Wrote {cap.count} datagrams to {path}")
+
+
+async def replay(path, speed=1.0, settle=0.5):
+    # Imported here so "synth" does not need the controller stack
+    from mock_motor_controller import MockMotorController
+    from exo_controller_ import WristExoController, UDPProtocol
+
+    records = read_capture(path)
+    controller = WristExoController(MockMotorController())
+    protocols = {port: UDPProtocol(handler, timestamped)
+                 for port, (handler, timestamped) in controller.port_handlers().items()}
+    if controller.status_poller is not None:
+        controller.status_poller.start()
+
+    print(f"Replaying {len(records)} datagrams from {path} at "
+          f"{'max' if speed <= 0 else f'{speed:g}x'} speed")
+    addr = ('127.0.0.1', 0)
+    control_started = False
+    skipped = 0
+    start = time.monotonic()
+    first_t = records[0][0] if records else 0.0
+
+    for t, port, data in records:
+        if speed > 0:
+            delay = start + (t - first_t) / speed - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        protocol = protocols.get(port)
+        if protocol is None:
+            skipped += 1
+            continue
+        protocol.datagram_received(data, addr)
+        await asyncio.sleep(0)  # let handler tasks and the control loop run
+        if not control_started and controller.system_initialized:
+            controller.start_control_tasks()
+            control_started = True
+
+    elapsed = time.monotonic() - start
+    await asyncio.sleep(settle)
+
+    delivered = len(records) - skipped
+    print(f"Replayed {delivered} datagrams in {elapsed:.3f} s "
+          f"({delivered / elapsed if elapsed > 0 else 0.0:.0f} datagrams/s), {skipped} on unknown ports")
+    controller.cleanup()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Record/replay UDP traffic for WristExoController')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_replay = sub.add_parser('replay', help='Replay a capture into a mock-backed controller')
+    p_replay.add_argument('capture', help='Capture file written via udp_capture_path')
+    p_replay.add_argument('--speed', type=float, default=1.0, help='Replay speed factor, 0 = as fast as possible')
+    p_replay.add_argument('--settle', type=float, default=0.5, help='Seconds to keep the control loop running after the last datagram')
+
+    p_synth = sub.add_parser('synth', help='Write a synthetic capture for benchmarking')
+    p_synth.add_argument('capture', help='Output capture file')
+    p_synth.add_argument('--rate', type=float, default=50.0, help='Prediction rate in Hz')
+    p_synth.add_argument('--duration', type=float, default=60.0, help='Duration in seconds')
+
+    args = parser.parse_args()
+    if args.command == 'replay':
+        asyncio.run(replay(args.capture, speed=args.speed, settle=args.settle))
+    else:
+        with open("config.json") as f:
+            config = json.load(f)
+        synthesize_capture(args.capture, config, rate_hz=args.rate, duration=args.duration)
@@ -0,0 +1,65 @@
+# backends.py
+# Heavy ML libraries (pandas, sklearn, joblib, TensorFlow) are imported on
+# first use instead of at module load, so the trainer server binds its socket
+# in well under a second. warmup() can import them ahead of time on a
+# background thread once the server is listening.
+#
+#   pd = backends.load("pandas")
+#   backends.warmup(backends.WARMUP_SETS["ridge"])
+import importlib
+import threading
+import time
+
+# Backends each server job type needs
+RIDGE_BACKENDS = ("pandas", "sklearn.model_selection", "sklearn.metrics")
+TFLITE_BACKENDS = ("tensorflow",)
+WARMUP_SETS = {
+    "none": (),
+    "ridge": RIDGE_BACKENDS,
+    "all": RIDGE_BACKENDS + TFLITE_BACKENDS,
+}
+
+_lock = threading.Lock()
+_loaded = {}
+_load_times = {}
+
+
+def load(name):
+    """Import a module on first use and return it. Safe to call from any thread."""
+    module = _loaded.get(name)
+    if module is not None:
+        return module
+    t0 = time.perf_counter()
+    module = importlib.import_module(name)  # the import system serializes concurrent imports
+    with _lock:
+        if name not in _loaded:
+            _loaded[name] = module
+            _load_times[name] = time.perf_counter() - t0
+    return module
+
+
+def warmup(names, background=True):
+    """Import names ahead of first use, by default on a daemon thread."""
+    def run():
+        t0 = time.perf_counter()
+        for name in names:
+            try:
+                load(name)
+            except ImportError as e:
+                print(f" Warmup of {name} failed: {e}")
+        print(f" Backends warmed up in {time.perf_counter() - t0:.2f} s: {', '.join(names)}")
+
+    if not names:
+        return None
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="backend-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def load_times():
+    """Seconds each backend took to import (in this process), by module name."""
+    with _lock:
+        return dict(_load_times)
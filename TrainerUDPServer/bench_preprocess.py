@@ -0,0 +1,83 @@
+# bench_preprocess.py
+# Compares the vectorized feature extraction (emg_features.py) against the
+# original per-window loop of EmgTrainer.preprocess on a synthetic recording.
+#   python bench_preprocess.py                       # 8 channels, 200 Hz, 10 min
+#   python bench_preprocess.py --minutes 2 --step 5
+import argparse
+import time
+import numpy as np
+
+from emg_features import PrefixSums, extract_features
+
+
+def preprocess_loop(raw_emg_data, window_size, features, step=1):
+    """Original EmgTrainer.preprocess loop (reference implementation), with a hop."""
+    X_features = []
+    for i in range(0, len(raw_emg_data) - window_size + 1, step):
+        window = raw_emg_data[i:i+window_size]
+        rectified = np.abs(window)
+        feat_vector = []
+        if "rms" in features:
+            feat_vector.extend(np.sqrt(np.mean(rectified**2, axis=0)))
+        if "mav" in features:
+            feat_vector.extend(np.mean(rectified, axis=0))
+        if "var" in features:
+            feat_vector.extend(np.var(rectified, axis=0))
+        if "wl" in features:
+            feat_vector.extend(np.sum(np.abs(np.diff(rectified, axis=0)), axis=0))
+        if "zc" in features:
+            threshold = 0.01
+            feat_vector.extend(np.sum(((rectified[:-1] * rectified[1:]) < 0) & (np.abs(rectified[:-1] - rectified[1:]) >= threshold), axis=0))
+        if "ssc" in features:
+            threshold = 0.01
+            feat_vector.extend(np.sum(((rectified[1:-1] - rectified[0:-2]) * (rectified[1:-1] - rectified[2:]) > threshold), axis=0))
+        X_features.append(feat_vector)
+    return np.array(X_features)
+
+
+def synthetic_emg(minutes=10.0, rate_hz=200, channels=8, seed=0):
+    """Band-limited noise with slowly varying per-channel activation, roughly EMG-like."""
+    rng = np.random.default_rng(seed)
+    n = int(minutes * 60 * rate_hz)
+    envelope = np.abs(np.cumsum(rng.normal(0, 0.02, (n, channels)), axis=0)) + 0.05
+    return (rng.normal(0, 1, (n, channels)) * envelope).astype(np.float64)
+
+
+def bench(fn, repeat):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark EMG sliding-window feature extraction")
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--rate", type=int, default=200)
+    parser.add_argument("--channels", type=int, default=8)
+    parser.add_argument("--step", type=int, default=1)
+    parser.add_argument("--windows", type=int, nargs="+", default=[10, 25, 60])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    raw = synthetic_emg(args.minutes, args.rate, args.channels)
+    features = ("rms", "mav", "var", "wl", "zc", "ssc")
+    print(f"Recording: {raw.shape[0]} samples x {raw.shape[1]} channels, step={args.step}")
+    print(f"{'window':>6} {'loop (s)':>10} {'vector (s)':>11} {'speedup':>8}  match")
+
+    for w in args.windows:
+        t_loop, ref = bench(lambda: preprocess_loop(raw, w, features, args.step), 1)
+        # Fresh prefix sums each run so the timing includes building them
+        t_vec, out = bench(lambda: extract_features(raw, w, features, step=args.step), args.repeat)
+        match = ref.shape == out.shape and np.allclose(ref, out, rtol=1e-7, atol=1e-8)  # prefix-sum round-off only
+        print(f"{w:>6} {t_loop:>10.3f} {t_vec:>11.4f} {t_loop / t_vec:>7.0f}x  {match}")
+
+    # Grid-search pattern: one set of prefix sums reused across every window size
+    ps = PrefixSums(raw)
+    t0 = time.perf_counter()
+    for w in args.windows:
+        extract_features(raw, w, features, step=args.step, prefix_sums=ps)
+    print(f"All windows with shared prefix sums: {time.perf_counter() - t0:.4f} s")
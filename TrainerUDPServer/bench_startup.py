@@ -0,0 +1,60 @@
+# bench_startup.py
+# Cold-start benchmark for the trainer server. Each run is a fresh interpreter
+# that imports wrist_exo_model_trainer and binds UdpTrainingServer, reporting
+# the time to a bound socket and peak RSS. Backend import times are measured
+# afterwards in the same process.
+#   python bench_startup.py                     # 5 runs, 1.0 s target
+#   python bench_startup.py --runs 10 --target 2.5 --backends all
+# Exits with status 1 if the median time to bind exceeds --target.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+import wrist_exo_model_trainer as trainer
+t_import = time.perf_counter() - t0
+server = trainer.UdpTrainingServer(host="127.0.0.1", port=0)
+t_bind = time.perf_counter() - t0
+rss_bind = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+server.socket.close()
+import backends
+backends.warmup(backends.WARMUP_SETS[sys.argv[1]], background=False)
+rss_warm = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({"import": t_import, "bind": t_bind, "rss_bind": rss_bind,
+                  "rss_warm": rss_warm, "backends": backends.load_times()}))
+"""
+
+
+def run_once(backend_set):
+    here = os.path.dirname(os.path.abspath(__file__))
+    out = subprocess.run([sys.executable, "-c", CHILD, backend_set], cwd=here,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure trainer server cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target", type=float, default=1.0, help="Target median seconds to a bound socket")
+    parser.add_argument("--backends", choices=["none", "ridge", "all"], default="ridge",
+                        help="Backend set to import after binding, for load-time figures")
+    args = parser.parse_args()
+
+    runs = [run_once(args.backends) for _ in range(args.runs)]
+    bind = [r["bind"] for r in runs]
+    print(f"Runs: {args.runs}")
+    print(f"Import trainer module: median {statistics.median(r['import'] for r in runs) * 1000:.0f} ms")
+    print(f"Time to bound socket:  median {statistics.median(bind) * 1000:.0f} ms, max {max(bind) * 1000:.0f} ms")
+    print(f"Peak RSS at bind:      {statistics.median(r['rss_bind'] for r in runs):.0f} MB")
+    print(f"Peak RSS after warmup: {statistics.median(r['rss_warm'] for r in runs):.0f} MB")
+    for name in runs[-1]["backends"]:
+        print(f"  load {name:<25} median {statistics.median(r['backends'][name] for r in runs) * 1000:.0f} ms")
+
+    ok = statistics.median(bind) <= args.target
+    print(f"{'PASS' if ok else 'FAIL'}: target {args.target * 1000:.0f} ms")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,139 @@
+# chunk_reassembly.py
+# Reassembles a chunked upload in place. The buffer is allocated once from the
+# header (total chunks x chunk size); each chunk payload is copied straight
+# from the received datagram into its slot through a memoryview, and a bitmap
+# records which chunks have arrived. The finished payload is handed on as a
+# memoryview and read by the parser without being joined, decoded or copied.
+# Header values are checked before anything is allocated: the chunk size must
+# fit in one UDP datagram and the upload must stay within max_bytes.
+import io
+
+DEFAULT_CHUNK_SIZE = 1400  # payload bytes per chunk sent by the Android app
+MAX_CHUNK_SIZE = 65507     # largest UDP payload over IPv4
+
+
+class ChunkReassembler:
+    def __init__(self, total_chunks, chunk_size=DEFAULT_CHUNK_SIZE, max_bytes=None):
+        if total_chunks <= 0:
+            raise ValueError(f"Invalid chunk count {total_chunks}")
+        self.total = total_chunks
+        self.max_bytes = max_bytes  # None = no cap
+        self._check_size(chunk_size)
+        self.chunk_size = chunk_size
+        self.received = 0
+        self.contiguous = 0    # every chunk below this index has arrived (cumulative ACK point)
+        self.highest = -1      # highest chunk index received
+        self.last_size = None  # payload length of the final (short) chunk
+        self._bitmap = bytearray((total_chunks + 7) // 8)
+        self._buffer = bytearray(total_chunks * chunk_size)
+
+    def has(self, index):
+        return bool(self._bitmap[index >> 3] & (1 << (index & 7)))
+
+    def add(self, index, payload):
+        """Store one chunk payload (bytes-like). Returns False for duplicates."""
+        if not 0 <= index < self.total:
+            raise ValueError(f"Chunk index {index} out of range 0..{self.total - 1}")
+        if self.has(index):
+            return False
+        size = len(payload)
+        if index == self.total - 1:
+            if size > self.chunk_size:
+                self._resize(size)
+            self.last_size = size
+        elif size != self.chunk_size:
+            # Sender uses another chunk size than declared; relayout once
+            self._resize(size)
+        offset = index * self.chunk_size
+        memoryview(self._buffer)[offset:offset + size] = payload
+        self._bitmap[index >> 3] |= 1 << (index & 7)
+        self.received += 1
+        self.highest = max(self.highest, index)
+        while self.contiguous < self.total and self.has(self.contiguous):
+            self.contiguous += 1
+        return True
+
+    def _check_size(self, chunk_size):
+        if not 1 <= chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(f"Invalid chunk size {chunk_size} (1..{MAX_CHUNK_SIZE})")
+        if self.max_bytes is not None and self.total * chunk_size > self.max_bytes:
+            raise ValueError(f"Upload of {self.total} x {chunk_size} bytes exceeds the {self.max_bytes} byte limit")
+
+    def _resize(self, chunk_size):
+        self._check_size(chunk_size)
+        if self.received and self.chunk_size != chunk_size and any(
+                self.has(i) for i in range(self.total - 1)):
+            raise ValueError(f"Chunk size changed from {self.chunk_size} to {chunk_size} mid-upload")
+        old = self._buffer
+        self._buffer = bytearray(self.total * chunk_size)
+        if self.last_size is not None:
+            # Only the final chunk can have been stored; move it to its new slot
+            src = (self.total - 1) * self.chunk_size
+            dst = (self.total - 1) * chunk_size
+            self._buffer[dst:dst + self.last_size] = old[src:src + self.last_size]
+        self.chunk_size = chunk_size
+
+    @property
+    def complete(self):
+        return self.received == self.total
+
+    def missing(self):
+        """Indices of chunks not received yet."""
+        return [i for i in range(self.contiguous, self.total) if not self.has(i)]
+
+    def bitmap_bytes(self, first_chunk, num_chunks):
+        """Received-bitmap bytes covering at least [first_chunk, first_chunk + num_chunks),
+        starting at the byte that holds first_chunk (bit i & 7 of byte i >> 3)."""
+        start = first_chunk >> 3
+        end = min(len(self._bitmap), (first_chunk + num_chunks + 7) >> 3)
+        return bytes(self._bitmap[start:end])
+
+    @property
+    def contiguous_bytes(self):
+        """Length of the payload prefix that has fully arrived (chunks 0 .. contiguous-1)."""
+        if self.complete:
+            return (self.total - 1) * self.chunk_size + self.last_size
+        return self.contiguous * self.chunk_size
+
+    def view(self, start, end):
+        """memoryview of payload bytes [start, end); only meaningful below contiguous_bytes."""
+        return memoryview(self._buffer)[start:end]
+
+    def find(self, sub, start, end):
+        return self._buffer.find(sub, start, end)
+
+    def rfind(self, sub, start, end):
+        return self._buffer.rfind(sub, start, end)
+
+    @property
+    def nbytes(self):
+        return len(self._buffer)
+
+    def payload(self):
+        """memoryview of the assembled upload (only valid once complete)."""
+        if not self.complete:
+            raise ValueError(f"Upload incomplete: {self.received}/{self.total} chunks")
+        length = (self.total - 1) * self.chunk_size + self.last_size
+        return memoryview(self._buffer)[:length]
+
+
+class BufferReader(io.RawIOBase):
+    """Read-only binary file over a bytes-like object, without copying it up front."""
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), len(self._view) - self._pos)
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+
+def open_payload(buffer):
+    """Buffered binary file object over an assembled payload, e.g. for pandas.read_csv."""
+    return io.BufferedReader(BufferReader(buffer))
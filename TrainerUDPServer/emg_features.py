@@ -0,0 +1,267 @@
+# emg_features.py
+# Sliding-window EMG feature extraction for EmgTrainer.preprocess. Each feature is
+# a window sum of some per-sample quantity, so all windows are computed at once
+# from prefix sums instead of looping over every window.
+from collections import OrderedDict
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Order in which feature blocks are concatenated (same as EmgTrainer.preprocess always used,
+# independent of the order in the requested feature tuple)
+FEATURE_ORDER = ("rms", "mav", "var", "wl", "zc", "ssc")
+ZC_THRESHOLD = 0.01
+SSC_THRESHOLD = 0.01
+# Below this window size RMS/MAV/VAR are computed on strided window views instead:
+# the cost is the same order and it avoids prefix-sum round-off on tiny windows
+SMALL_WINDOW = 8
+
+
+def window_starts(n_samples, window_size, step=1):
+    """Start index of every full window."""
+    if n_samples < window_size:
+        return np.empty(0, dtype=np.int64)
+    return np.arange(0, n_samples - window_size + 1, step, dtype=np.int64)
+
+
+def window_labels(labels, n_windows, step=1):
+    """Label of each window (the label at the window start, as the loop version used)."""
+    return labels[:n_windows * step:step]
+
+
+def _prefix(x):
+    """Cumulative sum along axis 0 with a leading zero row: S[j] = sum(x[:j])."""
+    out = np.zeros((x.shape[0] + 1,) + x.shape[1:], dtype=np.float64 if x.dtype.kind == "f" else np.int64)
+    np.cumsum(x, axis=0, out=out[1:])
+    return out
+
+
+def _zc(rect):
+    a, b = rect[:-1], rect[1:]
+    return ((a * b) < 0) & (np.abs(a - b) >= ZC_THRESHOLD)
+
+
+def _ssc(rect):
+    mid = rect[1:-1]
+    return ((mid - rect[:-2]) * (mid - rect[2:])) > SSC_THRESHOLD
+
+
+# Per-sample quantities behind the prefix sums that only look at neighbouring samples:
+# name -> (samples of lookahead, quantity of rect, prefix dtype). c1/c2 need the mean of
+# the whole recording and are built once it is complete.
+LOCAL_SUMS = {
+    "s1": (0, lambda rect: rect, np.float64),
+    "s2": (0, lambda rect: rect ** 2, np.float64),
+    "wl": (1, lambda rect: np.abs(np.diff(rect, axis=0)), np.float64),
+    "zc": (1, _zc, np.int64),
+    "ssc": (2, _ssc, np.int64),
+}
+
+
+class PrefixSums:
+    """
+    Window-independent prefix sums of one recording. Every sliding-window feature is
+    then two gathers and a subtraction per window, O(N) instead of O(N * W).
+    """
+
+    def __init__(self, raw_emg):
+        rect = np.abs(np.asarray(raw_emg, dtype=np.float64))
+        self.n_samples, self.n_channels = rect.shape
+        self.rect = rect
+        self._cache = {}
+
+    @classmethod
+    def from_arrays(cls, rect, sums):
+        """PrefixSums over an already rectified float64 recording with some sums precomputed."""
+        ps = cls.__new__(cls)
+        ps.n_samples, ps.n_channels = rect.shape
+        ps.rect = rect
+        ps._cache = dict(sums)
+        return ps
+
+    def get(self, name):
+        if name not in self._cache:
+            self._cache[name] = self._build(name)
+        return self._cache[name]
+
+    def _build(self, name):
+        rect = self.rect
+        if name in LOCAL_SUMS:
+            return _prefix(LOCAL_SUMS[name][1](rect))
+        if name == "c1" or name == "c2":
+            # Shifted by the channel mean so VAR = E[c^2] - E[c]^2 does not cancel badly
+            centered = rect - rect.mean(axis=0)
+            return _prefix(centered if name == "c1" else centered ** 2)
+        raise ValueError(f"Unknown prefix sum: {name}")
+
+    def _window_sum(self, name, starts, length):
+        s = self.get(name)
+        if length <= 0:
+            return np.zeros((len(starts), self.n_channels))
+        return s[starts + length] - s[starts]
+
+    def feature_block(self, feature, window_size, step=1):
+        """(n_windows, n_channels) block of one feature for every window."""
+        starts = window_starts(self.n_samples, window_size, step)
+        w = window_size
+        if w <= SMALL_WINDOW and feature in ("rms", "mav", "var"):
+            return self._strided_block(feature, starts, w)
+        if feature == "rms":
+            return np.sqrt(self._window_sum("s2", starts, w) / w)
+        if feature == "mav":
+            return self._window_sum("s1", starts, w) / w
+        if feature == "var":
+            mean = self._window_sum("c1", starts, w) / w
+            return np.maximum(self._window_sum("c2", starts, w) / w - mean ** 2, 0.0)
+        if feature == "wl":
+            return self._window_sum("wl", starts, w - 1)
+        if feature == "zc":
+            return self._window_sum("zc", starts, w - 1).astype(np.float64)
+        if feature == "ssc":
+            return self._window_sum("ssc", starts, w - 2).astype(np.float64)
+        raise ValueError(f"Unknown feature: {feature}")
+
+
+    def _strided_block(self, feature, starts, w):
+        if len(starts) == 0:
+            return np.zeros((0, self.n_channels))
+        windows = sliding_window_view(self.rect, w, axis=0)[starts]  # (n_windows, channels, w)
+        if feature == "rms":
+            return np.sqrt(np.mean(windows ** 2, axis=-1))
+        if feature == "mav":
+            return np.mean(windows, axis=-1)
+        return np.var(windows, axis=-1)
+
+
+class StreamingPrefixSums:
+    """
+    PrefixSums of a recording that is still arriving, fed either in blocks of rows
+    (append) or one whole channel at a time (add_channel, when the length is known).
+    The running sums continue in place from the last total, so finish() gives
+    arrays bit-identical to PrefixSums built from the complete recording.
+    """
+
+    def __init__(self, n_channels, n_samples=None):
+        self.n_channels = n_channels
+        self.n_samples = 0
+        self.fixed_length = n_samples
+        self._rect = np.empty((n_samples or 4096, n_channels))
+        self._sums = {name: np.zeros((len(self._rect) + 1, n_channels), dtype=dtype)
+                      for name, (_, _, dtype) in LOCAL_SUMS.items()}
+
+    def _reserve(self, n_samples):
+        capacity = len(self._rect)
+        if n_samples <= capacity:
+            return
+        capacity = max(n_samples, 2 * capacity)
+        rect = np.empty((capacity, self.n_channels))
+        rect[:self.n_samples] = self._rect[:self.n_samples]
+        self._rect = rect
+        for name, s in self._sums.items():
+            grown = np.zeros((capacity + 1, self.n_channels), dtype=s.dtype)
+            grown[:len(s)] = s
+            self._sums[name] = grown
+
+    def append(self, rows):
+        """Add the next samples, shape (m, n_channels)."""
+        if self.fixed_length is not None:
+            raise ValueError("append() on a stream fed by channel")
+        old, new = self.n_samples, self.n_samples + len(rows)
+        self._reserve(new)
+        self._rect[old:new] = np.abs(rows)
+        for name, (lag, quantity, _) in LOCAL_SUMS.items():
+            # Quantity q[j] reads rect[j:j + lag + 1]; compute the ones the new rows complete
+            first, last = max(0, old - lag), max(0, new - lag)
+            if last <= first:
+                continue
+            s = self._sums[name]
+            s[first + 1:last + 1] = quantity(self._rect[first:last + lag])
+            np.cumsum(s[first:last + 1], axis=0, out=s[first:last + 1])
+        self.n_samples = new
+
+    def add_channel(self, channel, values):
+        """Add the complete signal of one channel (stream created with n_samples)."""
+        if self.fixed_length is None or len(values) != self.fixed_length:
+            raise ValueError("add_channel() needs a stream created with the channel length")
+        rect = self._rect[:, channel]
+        np.abs(values, out=rect)
+        for name, (_, quantity, _) in LOCAL_SUMS.items():
+            q = quantity(rect)
+            np.cumsum(q, axis=0, out=self._sums[name][1:len(q) + 1, channel])
+        self.n_samples = self.fixed_length
+
+    def finish(self):
+        n = self.n_samples
+        sums = {name: self._sums[name][:max(1, n - lag + 1)] for name, (lag, _, _) in LOCAL_SUMS.items()}
+        return PrefixSums.from_arrays(self._rect[:n], sums)
+
+
+def _assemble(blocks, n_windows):
+    if not blocks:
+        return np.empty((n_windows, 0))
+    if len(blocks) == 1:
+        return blocks[0]
+    return np.hstack(blocks)
+
+
+def extract_features(raw_emg, window_size, features, step=1, prefix_sums=None):
+    """
+    Sliding-window EMG features for all windows at once. Returns an array of shape
+    (n_windows, n_channels * n_features) with blocks in FEATURE_ORDER.
+    """
+    ps = prefix_sums if prefix_sums is not None else PrefixSums(raw_emg)
+    blocks = [ps.feature_block(f, window_size, step) for f in FEATURE_ORDER if f in features]
+    return _assemble(blocks, len(window_starts(ps.n_samples, window_size, step)))
+
+
+class FeatureCache:
+    """
+    Per-recording cache of base feature blocks keyed by (window_size, feature, step).
+    A grid search over feature sets then computes each block once per window and only
+    concatenates cached columns. Memory is bounded by max_bytes with LRU eviction.
+    """
+
+    def __init__(self, raw_emg, max_bytes=256 * 1024 * 1024, prefix_sums=None):
+        self.prefix_sums = prefix_sums if prefix_sums is not None else PrefixSums(raw_emg)
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._blocks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def block(self, window_size, feature, step=1):
+        key = (window_size, feature, step)
+        block = self._blocks.get(key)
+        if block is not None:
+            self._blocks.move_to_end(key)
+            self.hits += 1
+            return block
+        self.misses += 1
+        block = self.prefix_sums.feature_block(feature, window_size, step)
+        block.flags.writeable = False  # shared between feature sets
+        self._blocks[key] = block
+        self.nbytes += block.nbytes
+        # Never evict the block just added, even if it alone exceeds the budget
+        while self.nbytes > self.max_bytes and len(self._blocks) > 1:
+            _, old = self._blocks.popitem(last=False)
+            self.nbytes -= old.nbytes
+            self.evictions += 1
+        return block
+
+    def features(self, window_size, features, step=1):
+        """Same result as extract_features(), built from cached blocks (read-only if a single block)."""
+        blocks = [self.block(window_size, f, step) for f in FEATURE_ORDER if f in features]
+        return _assemble(blocks, len(window_starts(self.prefix_sums.n_samples, window_size, step)))
+
+    def clear(self):
+        self._blocks.clear()
+        self.nbytes = 0
+
+    def get_stats(self):
+        return {
+            "blocks": len(self._blocks),
+            "mbytes": self.nbytes / (1024 * 1024),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
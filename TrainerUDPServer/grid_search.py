@@ -0,0 +1,145 @@
+# grid_search.py
+# Window x feature-set grid search for EmgTrainer, optionally spread over a
+# process pool. The recording and labels are copied into shared memory once;
+# every worker attaches to them and computes feature blocks with its own
+# FeatureCache, so no feature matrix is pickled to a worker.
+#
+# Pool workers import this module, so it must not import TensorFlow.
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+
+from emg_features import FeatureCache, window_labels
+from ridge_solver import train_ridge, train_ridge_for_exo
+
+WORKER_CACHE_MB = 128  # feature cache per worker process
+
+
+def _fit_single(X, y, alpha=1.0, alphas=None):
+    model, mse, mae = train_ridge(X, y, alpha=alpha, alphas=alphas)
+    return {"model": model, "mse": mse, "mae": mae, "alpha": model.alpha}
+
+
+# Fitters are looked up by name in the worker
+FITTERS = {"exo": train_ridge_for_exo, "single": _fit_single}
+
+
+def resolve_workers(workers):
+    """None or 0 = one worker per CPU core."""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def _pool_context():
+    # forkserver children do not inherit the server's threads and sockets
+    if "forkserver" not in mp.get_all_start_methods():
+        return mp.get_context("spawn")
+    ctx = mp.get_context("forkserver")
+    # Workers fork from a server that already imported numpy and the ridge backends
+    ctx.set_forkserver_preload(["grid_search", "sklearn.model_selection", "sklearn.metrics"])
+    return ctx
+
+
+class SharedArray:
+    """Copy of a numpy array in a named SharedMemory block, owned by the creator."""
+
+    def __init__(self, array):
+        array = np.ascontiguousarray(array)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.spec = (self.shm.name, array.shape, array.dtype.str)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf)[...] = array
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach(spec):
+    """Map a SharedArray by its spec. Returns (shm, array); keep shm alive while using array."""
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def evaluate_cell(cache, labels, window_size, features, step, fit, alpha, alphas):
+    """Fit one grid cell. Returns the fitter's result dict, or None if there are no windows.
+    alphas (a grid) selects alpha by GCV; otherwise the fixed alpha is used."""
+    X = cache.features(window_size, features, step=step)
+    y = window_labels(labels, X.shape[0], step)
+    if len(y) == 0:
+        return None
+    return FITTERS[fit](X, y, alpha=alpha, alphas=alphas)
+
+
+# ---------------- Worker side ----------------
+_worker = {}
+
+
+def _init_worker(raw_spec, labels_spec, cache_mb):
+    raw_shm, raw = attach(raw_spec)
+    labels_shm, labels = attach(labels_spec)
+    _worker["shm"] = (raw_shm, labels_shm)
+    _worker["labels"] = labels
+    _worker["cache"] = FeatureCache(raw, max_bytes=cache_mb * 1024 * 1024)
+
+
+def _run_cell(window_size, features, step, fit, alpha, alphas):
+    return evaluate_cell(_worker["cache"], _worker["labels"], window_size, features, step, fit, alpha, alphas)
+
+
+# ---------------- Parent side ----------------
+def run_grid(raw_emg, labels, cells, fit="exo", alpha=1.0, alphas=None, step=1, workers=1,
+             cache=None, on_result=None, cache_mb=WORKER_CACHE_MB, cancel_event=None):
+    """
+    Evaluate every (window_size, features) cell and return the results in cell order:
+    a result dict, None for a cell without windows, or the exception the cell raised.
+    on_result(index, result) runs in the calling thread as each cell finishes.
+    Results do not depend on the number of workers; only the on_result order does.
+    Once cancel_event is set no further cells start; unfinished cells stay None.
+    """
+    labels = np.asarray(labels, dtype=np.float64)
+    workers = min(resolve_workers(workers), len(cells))
+    results = [None] * len(cells)
+
+    if workers <= 1:
+        if cache is None:
+            cache = FeatureCache(raw_emg)
+        for i, (window_size, features) in enumerate(cells):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            try:
+                results[i] = evaluate_cell(cache, labels, window_size, features, step, fit, alpha, alphas)
+            except Exception as e:
+                results[i] = e
+            if on_result is not None:
+                on_result(i, results[i])
+        return results
+
+    raw_shared = SharedArray(np.asarray(raw_emg, dtype=np.float64))
+    labels_shared = SharedArray(labels)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(),
+                                 initializer=_init_worker,
+                                 initargs=(raw_shared.spec, labels_shared.spec, cache_mb)) as pool:
+            # Submitted window-major so each worker mostly reuses its cached blocks
+            futures = {pool.submit(_run_cell, window_size, tuple(features), step, fit, alpha, alphas): i
+                       for i, (window_size, features) in enumerate(cells)}
+            for future in as_completed(futures):
+                if cancel_event is not None and cancel_event.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    results[i] = e
+                if on_result is not None:
+                    on_result(i, results[i])
+    finally:
+        raw_shared.close()
+        labels_shared.close()
+    return results
@@ -0,0 +1,118 @@
+# model_download.py
+# Binary model download to the app's MODEL_SEND_PORT, replacing base64
+# MLP_TFLITE_CHUNK text packets for apps that ask for it in their upload header
+# ("MODEL_DOWNLOAD:BINARY"). Each datagram is
+#
+#   header  = magic "MDL1" (4s) transfer id (I) chunk index (I) total chunks (I)
+#             file size (I) chunk size (H), big-endian
+#   payload = file bytes [index * chunk size, +chunk size)
+#
+# Header plus payload stays below a 1500-byte MTU, so no packet is IP-fragmented
+# (one lost fragment loses the whole datagram). Chunks are paced at a fixed
+# byte rate and read from the file into one reused packet buffer through a
+# memoryview; the file is never loaded whole. The receiver drives recovery:
+#
+#   MODEL_NACK:<id>:<i>,<j>,...   resend these chunks
+#   MODEL_DONE:<id>               file complete
+#
+# If neither arrives within PROBE_INTERVAL the last chunk is sent again as a
+# probe, which makes the receiver NACK whatever it is still missing (or repeat
+# MODEL_DONE when its first one was lost).
+import os
+import struct
+import threading
+import time
+
+DOWNLOAD_MAGIC = b"MDL1"
+DOWNLOAD_HEADER = struct.Struct(">4sIIIIH")
+DOWNLOAD_CHUNK_SIZE = 1400       # 22-byte header + 1400 + UDP/IP headers < 1500
+DOWNLOAD_RATE = 2_000_000        # bytes per second
+PROBE_INTERVAL = 0.5             # seconds without feedback before a tail probe
+MAX_PROBES = 10                  # unanswered probes before giving up
+
+
+def new_transfer_id():
+    return int.from_bytes(os.urandom(4), "big")
+
+
+class ModelSender:
+    def __init__(self, sock, dest, file_path, transfer_id=None, chunk_size=DOWNLOAD_CHUNK_SIZE,
+                 rate=DOWNLOAD_RATE, probe_interval=PROBE_INTERVAL, max_probes=MAX_PROBES):
+        self.sock = sock
+        self.dest = dest
+        self.file_path = file_path
+        self.transfer_id = new_transfer_id() if transfer_id is None else transfer_id
+        self.chunk_size = chunk_size
+        self.rate = rate
+        self.probe_interval = probe_interval
+        self.max_probes = max_probes
+
+        self.size = os.path.getsize(file_path)
+        self.total = max(1, (self.size + chunk_size - 1) // chunk_size)
+        self._packet = bytearray(DOWNLOAD_HEADER.size + chunk_size)
+        self._view = memoryview(self._packet)
+        self._next_send = 0.0
+
+        self._lock = threading.Lock()
+        self._feedback = threading.Event()
+        self._nacked = set()
+        self.done = False
+        self.packets_sent = 0
+        self.retransmits = 0
+
+    # ---------------------- Receiver feedback (datagram threads) ----------------------
+    def on_nack(self, indices):
+        with self._lock:
+            self._nacked.update(i for i in indices if 0 <= i < self.total)
+            self._feedback.set()
+
+    def on_done(self):
+        with self._lock:
+            self.done = True
+            self._feedback.set()
+
+    # ---------------------- Sending ----------------------
+    def _send_chunk(self, f, index):
+        f.seek(index * self.chunk_size)
+        n = f.readinto(self._view[DOWNLOAD_HEADER.size:])
+        DOWNLOAD_HEADER.pack_into(self._packet, 0, DOWNLOAD_MAGIC, self.transfer_id, index,
+                                  self.total, self.size, self.chunk_size)
+        length = DOWNLOAD_HEADER.size + n
+
+        # Pace to self.rate; sleep only once at least 2 ms ahead so small chunks are sent in bursts
+        now = time.monotonic()
+        if self._next_send - now > 0.002:
+            time.sleep(self._next_send - now)
+        self._next_send = max(self._next_send, now) + length / self.rate
+
+        self.sock.sendto(self._view[:length], self.dest)
+        self.packets_sent += 1
+
+    def _send_chunks(self, f, indices, cancel_event):
+        for index in indices:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            self._send_chunk(f, index)
+
+    def run(self, cancel_event=None):
+        """Send the file and serve NACKs until the receiver confirms it. Returns True on success."""
+        with open(self.file_path, "rb") as f:
+            self._send_chunks(f, range(self.total), cancel_event)
+            probes = 0
+            while cancel_event is None or not cancel_event.is_set():
+                answered = self._feedback.wait(self.probe_interval)
+                with self._lock:
+                    self._feedback.clear()
+                    nacked, self._nacked = sorted(self._nacked), set()
+                    if self.done:
+                        return True
+                if nacked:
+                    probes = 0
+                    self.retransmits += len(nacked)
+                    self._send_chunks(f, nacked, cancel_event)
+                elif not answered:
+                    probes += 1
+                    if probes > self.max_probes:
+                        return False
+                    self._send_chunk(f, self.total - 1)
+        return False
@@ -0,0 +1,131 @@
+# progress_reporter.py
+# Training progress for the app, "TRAINING_PROGRESS <done>/<total> ETA:<s>s",
+# shared by the ridge grid search and MLP training. update() only records the
+# latest count, which is cheap enough to call for every Keras batch. One
+# sender thread per server sends each reporter's newest state at most `hz`
+# times a second over the server's socket, so intermediate counts are
+# coalesced and no send happens on a training thread. finish() always sends
+# the final state and waits until it is out, so it arrives before the model.
+# The ETA comes from the step throughput measured since the first update.
+import threading
+import time
+
+PROGRESS_HZ = 4.0
+ETA_MIN_ELAPSED = 1.0  # seconds of measured throughput before an ETA is given
+
+
+class ProgressReporter:
+    def __init__(self, sender, dest, total):
+        self.sender = sender
+        self.dest = dest
+        self.total = total
+        self.done = 0
+        self.updates = 0
+        self.final = False
+        self.started = None       # clock() at the first update
+        self.last_sent_at = None
+        self.last_sent = None     # (done, final) of the last message sent
+        self.queued = False       # waiting in the sender; guarded by the sender's lock
+        self.sent_final = threading.Event()
+
+    def update(self, done):
+        """Record progress; sent later by the sender thread (coalesced with later updates)."""
+        if self.final:
+            return
+        if self.started is None:
+            self.started = self.sender.clock()
+        self.done = done
+        self.updates += 1
+        if not self.queued:
+            self.sender.wake(self)
+
+    def finish(self, done=None, timeout=1.0):
+        """Send the final state now (done defaults to the last update) and wait until it is sent."""
+        if done is not None:
+            self.done = done
+        self.final = True
+        self.sender.wake(self)
+        self.sent_final.wait(timeout)
+
+    def eta(self):
+        """Seconds left at the throughput so far, or None before the first measurement."""
+        if self.started is None or self.done <= 0 or self.total <= self.done:
+            return None
+        elapsed = self.sender.clock() - self.started
+        if elapsed < ETA_MIN_ELAPSED:
+            return None
+        return elapsed / self.done * (self.total - self.done)
+
+    def message(self):
+        msg = f"TRAINING_PROGRESS {self.done}/{self.total}"
+        eta = None if self.final else self.eta()
+        if eta is not None:
+            msg += f" ETA:{eta:.0f}s"
+        return msg
+
+
+class ProgressSender:
+    def __init__(self, sock, hz=PROGRESS_HZ, clock=time.monotonic):
+        self.sock = sock
+        self.interval = 1.0 / hz if hz > 0 else 0.0
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._queued = []
+        self._stopped = False
+        self.sent = 0
+
+    def start(self):
+        threading.Thread(target=self._run, name="progress", daemon=True).start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def reporter(self, dest, total):
+        return ProgressReporter(self, dest, total)
+
+    def wake(self, reporter):
+        with self._cond:
+            if not reporter.queued:
+                reporter.queued = True
+                self._queued.append(reporter)
+            self._cond.notify()
+
+    def _due(self):
+        """Wait for reporters whose rate limit allows a send (final states always do)."""
+        with self._cond:
+            while not self._stopped:
+                now = self.clock()
+                due, wait = [], None
+                for r in self._queued:
+                    ready_at = now if r.final or r.last_sent_at is None else r.last_sent_at + self.interval
+                    if ready_at <= now:
+                        due.append(r)
+                    else:
+                        wait = ready_at - now if wait is None else min(wait, ready_at - now)
+                if due:
+                    for r in due:
+                        r.queued = False
+                    self._queued = [r for r in self._queued if r.queued]
+                    return due
+                self._cond.wait(wait)
+            return None
+
+    def _run(self):
+        while True:
+            due = self._due()
+            if due is None:
+                return
+            for r in due:
+                state = (r.done, r.final)
+                if state != r.last_sent:
+                    try:
+                        self.sock.sendto(r.message().encode(), r.dest)
+                        self.sent += 1
+                    except Exception as e:
+                        print(f" Failed to send training progress to {r.dest}: {e}")
+                    r.last_sent = state
+                    r.last_sent_at = self.clock()
+                if r.final:
+                    r.sent_final.set()
@@ -0,0 +1,123 @@
+# result_cache.py
+# Disk cache of finished training results for UdpTrainingServer. Entries are
+# content-addressed: the key is a SHA-256 over the assembled upload bytes, the
+# model type and the trainer configuration, so retraining on the same
+# recording (after an app crash or a dropped connection) returns the stored
+# ridge JSON or TFLite file without another grid search, and any change to the
+# grid or solver misses instead of serving a stale model. Files are
+# <key><suffix> in one directory; total size is capped with LRU eviction, and
+# file mtimes carry the LRU order across restarts.
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def result_key(payload, model_type, config):
+    """Hex key for an upload (bytes-like), a model type and a JSON-serialisable trainer config."""
+    h = hashlib.sha256()
+    h.update(model_type.encode())
+    h.update(b"\0")
+    h.update(json.dumps(config, sort_keys=True).encode())
+    h.update(b"\0")
+    h.update(memoryview(payload).cast("B"))
+    return h.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()  # file name -> size, least recently used first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.nbytes += size
+        with self._lock:
+            self._evict()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def get(self, key, suffix):
+        """Path of the cached result, or None. A hit makes the entry most recently used."""
+        name = key + suffix
+        with self._lock:
+            if name not in self._entries or not os.path.exists(self._path(name)):
+                self.nbytes -= self._entries.pop(name, 0)  # drop entries deleted behind our back
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+            self.hits += 1
+        os.utime(self._path(name))
+        return self._path(name)
+
+    def get_bytes(self, key, suffix):
+        path = self.get(key, suffix)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:  # evicted in between
+            return None
+
+    def put(self, key, suffix, data=None, src_path=None):
+        """Store data (bytes-like) or a copy of the file at src_path under key. Returns the entry's path."""
+        name = key + suffix
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if src_path is not None:
+                    with open(src_path, "rb") as src:
+                        shutil.copyfileobj(src, f)
+                else:
+                    f.write(data)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, self._path(name))  # atomic: readers never see a partial file
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        with self._lock:
+            self.nbytes += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            self._evict(keep=name)
+        return self._path(name)
+
+    def _evict(self, keep=None):
+        while self.nbytes > self.max_bytes and self._entries:
+            name, size = next(iter(self._entries.items()))
+            if name == keep:
+                break  # never evict the entry just added, even if it alone exceeds the budget
+            del self._entries[name]
+            self.nbytes -= size
+            self.evictions += 1
+            try:
+                os.unlink(self._path(name))
+            except FileNotFoundError:
+                pass
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "mbytes": self.nbytes / (1024 * 1024),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
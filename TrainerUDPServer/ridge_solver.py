@@ -0,0 +1,135 @@
+# ridge_solver.py
+# Closed-form multi-output ridge regression used by EmgTrainer and the
+# grid-search workers. All output columns are solved together from a single
+# eigendecomposition of the centred Gram matrix, which is then reused for
+# any number of alpha values, including the generalized cross-validation
+# (GCV) scores used to choose alpha without refitting per fold. Kept free of
+# TensorFlow so pool workers can import it cheaply.
+#
+# Solutions match sklearn.linear_model.Ridge(alpha, fit_intercept=True).
+import numpy as np
+
+import backends
+
+# Log-spaced alpha grid searched by GCV when no alpha is fixed
+ALPHA_GRID = tuple(np.logspace(-3, 4, 29))
+
+
+class RidgeModel:
+    """Fitted ridge model with sklearn-style coef_ (n_outputs, n_features) and intercept_."""
+
+    def __init__(self, coef, intercept, alpha=None):
+        self.coef_ = coef
+        self.intercept_ = intercept
+        self.alpha = alpha
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef_.T + self.intercept_
+
+    def outputs(self):
+        """One single-output RidgeModel per output column (coef_ 1-D, intercept_ float)."""
+        if self.coef_.ndim == 1:
+            return [self]
+        return [RidgeModel(self.coef_[i], float(self.intercept_[i]), self.alpha)
+                for i in range(self.coef_.shape[0])]
+
+
+class RidgeSolver:
+    """
+    Factorizes one training set; fit(alpha) is then a p x p product per alpha.
+    X is centred, Xc'Xc = V diag(eigvals) V' is computed once, and
+    W(alpha) = V diag(1 / (eigvals + alpha)) V' Xc'Yc for all outputs at once.
+    """
+
+    def __init__(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self.single_output = y.ndim == 1
+        Y = y.reshape(len(y), -1)
+
+        self.n_samples = X.shape[0]
+        self.x_mean = X.mean(axis=0)
+        self.y_mean = Y.mean(axis=0)
+        Xc = X - self.x_mean
+        Yc = Y - self.y_mean
+        self.y_sq = np.sum(Yc ** 2, axis=0)
+
+        eigvals, self.eigvecs = np.linalg.eigh(Xc.T @ Xc)
+        self.eigvals = np.maximum(eigvals, 0.0)  # clip round-off below zero
+        self.proj = self.eigvecs.T @ (Xc.T @ Yc)  # V' Xc' Yc, (n_features, n_outputs)
+
+    def coef(self, alpha):
+        """(n_features, n_outputs) coefficients of the centred problem."""
+        denom = self.eigvals + alpha
+        inv = np.divide(1.0, denom, out=np.zeros_like(denom), where=denom > 0)
+        return self.eigvecs @ (self.proj * inv[:, None])
+
+    def fit(self, alpha):
+        W = self.coef(alpha)
+        intercept = self.y_mean - self.x_mean @ W
+        if self.single_output:
+            return RidgeModel(W[:, 0], float(intercept[0]), alpha)
+        return RidgeModel(W.T, intercept, alpha)
+
+    def path(self, alphas):
+        return [self.fit(alpha) for alpha in alphas]
+
+    def gcv(self, alphas):
+        """
+        GCV score per alpha, summed over outputs: n * RSS / (n - df)^2, the rotation-invariant
+        form of the closed-form leave-one-out error. Uses only the stored factorization.
+        """
+        e = self.eigvals
+        tol = e.max(initial=0.0) * 1e-12
+        nonzero = e > tol
+        # (U' Yc)^2 per component, U = Xc V diag(1/sqrt(e)); null components never enter the fit
+        uty_sq = np.zeros_like(self.proj)
+        uty_sq[nonzero] = self.proj[nonzero] ** 2 / e[nonzero, None]
+        explained = uty_sq.sum(axis=1)
+        scores = []
+        for alpha in alphas:
+            shrink = alpha / (e[nonzero] + alpha)
+            rss = self.y_sq.sum() - np.sum(explained[nonzero] * (1.0 - shrink ** 2))
+            df = 1.0 + np.sum(e[nonzero] / (e[nonzero] + alpha))  # +1 for the intercept
+            scores.append(self.n_samples * rss / max(self.n_samples - df, 1e-12) ** 2)
+        return np.array(scores)
+
+    def select_alpha(self, alphas=ALPHA_GRID):
+        """Alpha with the lowest GCV score (the first one on ties)."""
+        return float(alphas[int(np.argmin(self.gcv(alphas)))])
+
+
+def _train_test_split(X, y):
+    # sklearn is only needed for the split and metrics, so it is loaded on first use
+    model_selection = backends.load("sklearn.model_selection")
+    return model_selection.train_test_split(X, y, test_size=0.2, random_state=42)
+
+
+def _fit_and_score(X_train, X_test, y_train, y_test, alpha, alphas):
+    metrics = backends.load("sklearn.metrics")
+    solver = RidgeSolver(X_train, y_train)
+    model = solver.fit(solver.select_alpha(alphas) if alphas is not None else alpha)
+    y_pred = model.predict(X_test)
+    return model, metrics.mean_squared_error(y_test, y_pred), metrics.mean_absolute_error(y_test, y_pred)
+
+
+def train_ridge_for_exo(X, y, alpha=1.0, alphas=None):
+    """
+    One ridge model per one-hot output column, solved together.
+    alphas: grid to choose alpha from by GCV on the training split (one factorization);
+    otherwise alpha is used as given. mse/mae are always on the held-out split.
+    Returns {"models", "mse", "mae", "alpha"}; models[i] has coef_ / intercept_.
+    """
+    # y is one-hot: [[1,0,0,0], [0,1,0,0], ...]
+    y_class = np.array(y)[:, :4]
+
+    X_train, X_test, y_train, y_test = _train_test_split(X, y_class)
+    model, mse, mae = _fit_and_score(X_train, X_test, y_train, y_test, alpha, alphas)
+
+    return {"models": model.outputs(), "mse": mse, "mae": mae, "alpha": model.alpha}
+
+
+def train_ridge(X, y, alpha=1.0, alphas=None):
+    """Single ridge model on y (one column or several). Returns (model, mse, mae)."""
+    X_train, X_test, y_train, y_test = _train_test_split(X, np.asarray(y))
+    return _fit_and_score(X_train, X_test, y_train, y_test, alpha, alphas)
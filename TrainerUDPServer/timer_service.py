@@ -0,0 +1,98 @@
+# timer_service.py
+# Timed callbacks for UdpTrainingServer on one thread: deadlines live in a
+# min-heap and the thread sleeps exactly until the earliest one. A timer is
+# identified by a key, and scheduling a key again moves its deadline. Moving a
+# deadline later (every received chunk pushes its session's timeout back) only
+# updates a dict; the heap entry is re-pushed with the current deadline when it
+# comes due. The heap therefore holds about one entry per live timer, however
+# often timers are pushed back.
+# Callbacks run on the timer thread and must be short; the server uses them to
+# hand work to the datagram thread that owns the session.
+import heapq
+import itertools
+import threading
+import time
+
+
+class TimerService:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._heap = []    # (deadline, seq, key); may hold stale entries, see module comment
+        self._timers = {}  # key -> (deadline, callback)
+        self._seq = itertools.count()
+        self._stopped = False
+        self._thread = None
+        self.fired = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="timers", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._timers.clear()
+            self._heap.clear()
+            self._cond.notify()
+
+    def schedule(self, key, delay, callback, replace=True):
+        """Run callback() delay seconds from now, replacing key's pending timer
+        (replace=False keeps a pending timer as it is)."""
+        deadline = self.clock() + delay
+        with self._cond:
+            current = self._timers.get(key)
+            if current is not None and not replace:
+                return
+            self._timers[key] = (deadline, callback)
+            if current is None or deadline < current[0]:
+                heapq.heappush(self._heap, (deadline, next(self._seq), key))
+                if self._heap[0][0] == deadline:
+                    self._cond.notify()  # new earliest deadline
+
+    def cancel(self, key):
+        """Drop key's pending timer. Returns True if there was one."""
+        with self._cond:
+            return self._timers.pop(key, None) is not None
+
+    def pending(self, key):
+        with self._cond:
+            return key in self._timers
+
+    def _next_due(self):
+        """Block until a timer is due and return its callback (None once stopped)."""
+        with self._cond:
+            while not self._stopped:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                deadline, _, key = self._heap[0]
+                now = self.clock()
+                if deadline > now:
+                    self._cond.wait(deadline - now)
+                    continue
+                heapq.heappop(self._heap)
+                timer = self._timers.get(key)
+                if timer is None:
+                    continue  # cancelled or already fired
+                if timer[0] > now:
+                    heapq.heappush(self._heap, (timer[0], next(self._seq), key))  # pushed back meanwhile
+                    continue
+                del self._timers[key]
+                return timer[1]
+            return None
+
+    def _run(self):
+        while True:
+            callback = self._next_due()
+            if callback is None:
+                return
+            try:
+                callback()
+            except Exception as e:
+                print(f" Timer callback failed: {e}")
+            self.fired += 1
+
+    def get_stats(self):
+        with self._cond:
+            return {"timers": len(self._timers), "heap": len(self._heap), "fired": self.fired}
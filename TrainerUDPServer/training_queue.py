@@ -0,0 +1,191 @@
+# training_queue.py
+# Training job queue for UdpTrainingServer. At most max_concurrent jobs run at
+# once. Waiting jobs are served round-robin across clients, so one phone
+# uploading repeatedly cannot starve another. Waiting clients are told their
+# queue position when it changes, and again on every repeat_positions() call
+# (the server runs one on a timer) so a client waiting behind a long job keeps
+# hearing from the server. A client's queued or running jobs can be cancelled
+# (the server does this when the client starts a new upload).
+import itertools
+import threading
+from collections import OrderedDict, deque
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once it has been cancelled."""
+
+
+class TrainingJob:
+    def __init__(self, job_id, client, fn, args):
+        self.id = job_id
+        self.client = client
+        self.fn = fn
+        self.args = args
+        self.state = "queued"  # queued, running, done, failed, cancelled
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Call at safe points inside the job; raises JobCancelled if it was cancelled."""
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"job {self.id} for {self.client} cancelled")
+
+
+class TrainingJobQueue:
+    def __init__(self, max_concurrent=1, on_position=None):
+        """
+        on_position(job, position) is called (outside the lock) for every waiting job
+        whose 1-based queue position changed.
+        """
+        self.max_concurrent = max_concurrent
+        self.on_position = on_position
+
+        self._cond = threading.Condition()
+        self._waiting = OrderedDict()  # client -> deque of jobs; key order is the round-robin order
+        self._running = {}             # job id -> job
+        self._positions = {}           # job id -> last position reported
+        self._ids = itertools.count(1)
+        self._stopped = False
+        self._workers = []
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def start(self):
+        for i in range(self.max_concurrent):
+            worker = threading.Thread(target=self._run, name=f"training-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            for dq in self._waiting.values():
+                for job in dq:
+                    self._cancel(job)
+            self._waiting.clear()
+            for job in self._running.values():
+                job.cancel_event.set()
+            self._cond.notify_all()
+
+    # ---------------------- Producers ----------------------
+    def submit(self, client, fn, *args):
+        """Queue fn(job, *args) for client and return the job."""
+        with self._cond:
+            job = TrainingJob(next(self._ids), client, fn, args)
+            self._waiting.setdefault(client, deque()).append(job)
+            self.submitted += 1
+            self._cond.notify()
+            changed = self._position_changes()
+        self._report(changed)
+        return job
+
+    def cancel_client(self, client):
+        """Cancel every queued and running job of client. Returns how many were cancelled."""
+        with self._cond:
+            count = 0
+            for job in self._waiting.pop(client, ()):
+                self._cancel(job)
+                count += 1
+            for job in self._running.values():
+                if job.client == client and not job.cancelled:
+                    job.cancel_event.set()
+                    count += 1
+            changed = self._position_changes()
+        self._report(changed)
+        return count
+
+    def _cancel(self, job):
+        job.cancel_event.set()
+        job.state = "cancelled"
+        self._positions.pop(job.id, None)
+        self.cancelled += 1
+
+    # ---------------------- Scheduling ----------------------
+    def _order(self):
+        """Waiting jobs in the order they will start (round-robin over clients)."""
+        queues = list(self._waiting.values())
+        depth = max((len(dq) for dq in queues), default=0)
+        return [dq[r] for r in range(depth) for dq in queues if r < len(dq)]
+
+    def _position_changes(self):
+        changed = []
+        idle = self.max_concurrent - len(self._running)
+        for position, job in enumerate(self._order(), 1):
+            if position <= idle:
+                continue  # an idle worker is about to pick it up
+            if self._positions.get(job.id) != position:
+                self._positions[job.id] = position
+                changed.append((job, position))
+        return changed
+
+    def repeat_positions(self):
+        """Report every waiting job's current position again, changed or not."""
+        with self._cond:
+            waiting = [(job, self._positions[job.id]) for job in self._order() if job.id in self._positions]
+        self._report(waiting)
+
+    def _report(self, changed):
+        if self.on_position is None:
+            return
+        for job, position in changed:
+            try:
+                self.on_position(job, position)
+            except Exception as e:
+                print(f" Failed to report queue position to {job.client}: {e}")
+
+    def _next_job(self):
+        client, dq = next(iter(self._waiting.items()))
+        job = dq.popleft()
+        del self._waiting[client]
+        if dq:
+            self._waiting[client] = dq  # back of the round-robin order
+        self._positions.pop(job.id, None)
+        return job
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._waiting and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                job = self._next_job()
+                job.state = "running"
+                self._running[job.id] = job
+                changed = self._position_changes()
+            self._report(changed)
+
+            try:
+                job.fn(job, *job.args)
+                job.state = "done"  # returned normally, even if cancelled afterwards
+            except JobCancelled:
+                job.state = "cancelled"
+            except Exception as e:
+                job.state = "failed"
+                print(f" Training job {job.id} for {job.client} failed: {e}")
+            finally:
+                with self._cond:
+                    self._running.pop(job.id, None)
+                    if job.state == "done":
+                        self.completed += 1
+                    elif job.state == "failed":
+                        self.failed += 1
+                    else:
+                        self.cancelled += 1
+
+    def get_stats(self):
+        with self._cond:
+            return {
+                "waiting": sum(len(dq) for dq in self._waiting.values()),
+                "running": len(self._running),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+            }
@@ -0,0 +1,67 @@
+# upload_ack.py
+# Selective acknowledgements for chunked uploads. Legacy clients get one
+# "ACK:<i>" per chunk (stop-and-wait). A client that puts "ACK_MODE:SACK" and
+# "WINDOW:<n>" in its header is answered with "HEADER_ACK:SACK:<window>" and
+# may then keep up to <window> chunks in flight past the cumulative ACK point.
+# The server acknowledges with
+#
+#   SACK:<cum>:<base>:<hex bitmap>
+#
+# cum    every chunk below cum has arrived
+# base   first chunk covered by the bitmap (cum rounded down to a multiple of 8)
+# bitmap received flags for chunks base, base+1, ... (bit k & 7 of byte k >> 3)
+#
+# A SACK goes out every SACK_EVERY new chunks or SACK_INTERVAL seconds, and at
+# once when a gap appears, a hole is filled, a duplicate arrives or the upload
+# completes. The client retransmits the holes as soon as it sees them, instead
+# of waiting for the server's stale-upload timeout. Chunks that trigger none of
+# these are acknowledged by a delayed SACK once SACK_INTERVAL has passed.
+import time
+
+SACK_EVERY = 16
+SACK_INTERVAL = 0.02
+MAX_WINDOW = 256
+DEFAULT_WINDOW = 32
+
+
+def negotiate_window(requested):
+    return max(1, min(int(requested), MAX_WINDOW))
+
+
+class SackAcker:
+    def __init__(self, reassembler, window=DEFAULT_WINDOW, every=SACK_EVERY, interval=SACK_INTERVAL,
+                 clock=time.monotonic):
+        self.reassembler = reassembler
+        self.window = window
+        self.every = every
+        self.interval = interval
+        self.clock = clock
+        self._since_sack = 0
+        self._last_sack = clock()
+        self.sacks_sent = 0
+
+    def on_chunk(self, index, is_new, prev_contiguous, prev_highest):
+        """Return True if a SACK should be sent now for this arrival."""
+        r = self.reassembler
+        self._since_sack += is_new
+        urgent = (not is_new                                 # retransmission or duplicate: our SACK was lost
+                  or index > prev_highest + 1                # new gap: ask for the hole right away
+                  or r.contiguous > prev_contiguous + 1      # a hole was filled
+                  or r.complete)
+        return (urgent or self._since_sack >= self.every
+                or self.clock() - self._last_sack >= self.interval)
+
+    @property
+    def owed(self):
+        """New chunks arrived since the last SACK."""
+        return self._since_sack > 0
+
+    def message(self):
+        r = self.reassembler
+        cum = r.contiguous
+        base = cum & ~7
+        bitmap = r.bitmap_bytes(base, self.window + 8) if cum < r.total else b""
+        self._since_sack = 0
+        self._last_sack = self.clock()
+        self.sacks_sent += 1
+        return f"SACK:{cum}:{base}:{bitmap.hex()}".encode()
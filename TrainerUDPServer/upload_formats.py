@@ -0,0 +1,206 @@
+# upload_formats.py
+# Training-data upload formats accepted by UdpTrainingServer. The format is
+# named in the header packet's first line: "MODEL_TYPE:<type>[:<format>]";
+# without a format the upload is CSV (older app versions).
+#
+# CSV: text with a header row; EMG channels then the 4 one-hot label columns.
+#
+# F32: binary columnar, all little-endian
+#   header  = magic "EMGC" (4s) version (H) channels (H) labels (H) dtype (H) samples (I)
+#   emg     = channels columns of `samples` float32 values, one column after the other
+#   labels  = labels columns of `samples` float32 values
+# Parsed with np.frombuffer into views of the received buffer (no copy).
+#
+# StreamingParser parses either format from the contiguous prefix of an upload
+# that is still arriving, so most parsing and prefix-sum work is done by the
+# time the last chunk lands.
+#
+# Every path yields SAMPLE_DTYPE arrays, so an upload trains the same model
+# (and maps to the same result cache entry) whichever path parsed it.
+import struct
+import numpy as np
+
+import backends
+from chunk_reassembly import open_payload
+from emg_features import StreamingPrefixSums
+
+UPLOAD_FORMATS = ("CSV", "F32")
+NUM_LABELS = 4
+
+BINARY_MAGIC = b"EMGC"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sHHHHI")
+BINARY_DTYPES = {1: np.dtype("<f4")}
+SAMPLE_DTYPE = np.float32  # parsed EMG and labels, whatever the upload format
+STREAM_MIN_BYTES = 64 * 1024  # CSV text parsed per streaming step, at least
+
+
+def parse_csv(payload, num_labels=NUM_LABELS):
+    pd = backends.load("pandas")
+    df = pd.read_csv(open_payload(payload), dtype=SAMPLE_DTYPE)
+    raw_emg = df.iloc[:, :-num_labels].values  # First 8 columns are EMG data
+    labels = df.iloc[:, -num_labels:].values   # Last 4 columns are one-hot labels
+    return raw_emg, labels
+
+
+def parse_binary_header(view):
+    """(channels, num_labels, samples, dtype) from the first BINARY_HEADER.size bytes."""
+    if len(view) < BINARY_HEADER.size:
+        raise ValueError("Binary upload shorter than its header")
+    magic, version, channels, num_labels, dtype_code, samples = BINARY_HEADER.unpack_from(view)
+    if magic != BINARY_MAGIC:
+        raise ValueError("Binary upload has a bad magic number")
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unsupported binary upload version {version}")
+    dtype = BINARY_DTYPES.get(dtype_code)
+    if dtype is None:
+        raise ValueError(f"Unsupported binary upload dtype code {dtype_code}")
+    return channels, num_labels, samples, dtype
+
+
+def parse_binary(payload):
+    """(raw_emg, labels) as (samples, channels) / (samples, labels) views of payload."""
+    view = memoryview(payload).cast("B")
+    channels, num_labels, samples, dtype = parse_binary_header(view)
+    expected = BINARY_HEADER.size + (channels + num_labels) * samples * dtype.itemsize
+    if len(view) != expected:
+        raise ValueError(f"Binary upload is {len(view)} bytes, header implies {expected}")
+
+    columns = np.frombuffer(view, dtype=dtype, count=(channels + num_labels) * samples,
+                            offset=BINARY_HEADER.size).reshape(channels + num_labels, samples)
+    # Transposed views: row = sample, column-major in memory
+    return columns[:channels].T, columns[channels:].T
+
+
+def parse_upload(payload, data_format="CSV"):
+    """Decode an assembled upload into (raw_emg, labels)."""
+    if data_format == "CSV":
+        return parse_csv(payload)
+    if data_format == "F32":
+        return parse_binary(payload)
+    raise ValueError(f"Unknown upload format {data_format}")
+
+
+class StreamingParser:
+    """
+    Parses an upload from its contiguous received prefix while chunks are still arriving
+    (call update() whenever the prefix grows, finish() once the upload is complete).
+    CSV rows are appended to a growing float32 array in pieces of at least min_bytes;
+    F32 channels are summed as soon as their column has arrived. Both feed a
+    StreamingPrefixSums, so feature blocks of any window are cheap gathers at the end.
+    A parse problem only turns streaming off: finish() then returns None and the
+    complete payload is parsed by parse_upload as before.
+    """
+
+    def __init__(self, reassembler, data_format, num_labels=NUM_LABELS, min_bytes=STREAM_MIN_BYTES):
+        self.reassembler = reassembler
+        self.data_format = data_format
+        self.num_labels = num_labels
+        self.min_bytes = min_bytes
+        self.failed = None        # why streaming was given up
+        self.prefix_sums = None   # StreamingPrefixSums, once the header is parsed
+        self.consumed = 0         # CSV: payload bytes parsed so far
+        self.n_rows = 0
+        self._rows = None
+        self._layout = None       # F32: (channels, num_labels, samples, dtype)
+        self._channels_done = 0
+
+    def update(self):
+        """Parse newly completed data; never raises."""
+        if self.failed is not None:
+            return
+        try:
+            if self.data_format == "CSV":
+                self._update_csv(final=False)
+            elif self.data_format == "F32":
+                self._update_binary()
+            else:
+                self.failed = f"no streaming parser for {self.data_format}"
+        except Exception as e:
+            self.failed = str(e)
+
+    def _update_csv(self, final):
+        r = self.reassembler
+        end = r.contiguous_bytes
+        if not final and end - self.consumed < self.min_bytes:
+            return
+        if self.prefix_sums is None:
+            newline = r.find(b"\n", 0, end)
+            if newline < 0:
+                if final:
+                    raise ValueError("CSV upload has no data rows")
+                return
+            columns = len(bytes(r.view(0, newline)).split(b","))
+            if columns <= self.num_labels:
+                raise ValueError(f"CSV upload has {columns} columns")
+            self._rows = np.empty((4096, columns), dtype=SAMPLE_DTYPE)
+            self.prefix_sums = StreamingPrefixSums(columns - self.num_labels)
+            self.consumed = newline + 1
+        # Only whole lines until the upload is complete
+        cut = end if final else r.rfind(b"\n", self.consumed, end) + 1
+        if cut <= self.consumed:
+            return
+
+        pd = backends.load("pandas")
+        try:
+            rows = pd.read_csv(open_payload(r.view(self.consumed, cut)), header=None, dtype=SAMPLE_DTYPE).to_numpy()
+        except pd.errors.EmptyDataError:  # only blank lines left
+            self.consumed = cut
+            return
+        if rows.shape[1] != self._rows.shape[1]:
+            raise ValueError(f"CSV row with {rows.shape[1]} columns, header has {self._rows.shape[1]}")
+        n = self.n_rows + len(rows)
+        if n > len(self._rows):
+            grown = np.empty((max(n, 2 * len(self._rows)), self._rows.shape[1]), dtype=SAMPLE_DTYPE)
+            grown[:self.n_rows] = self._rows[:self.n_rows]
+            self._rows = grown
+        self._rows[self.n_rows:n] = rows
+        self.prefix_sums.append(rows[:, :-self.num_labels])
+        self.n_rows = n
+        self.consumed = cut
+
+    def _update_binary(self):
+        r = self.reassembler
+        end = r.contiguous_bytes
+        if self._layout is None:
+            if end < BINARY_HEADER.size:
+                return
+            self._layout = parse_binary_header(r.view(0, BINARY_HEADER.size))
+            channels, _, samples, _ = self._layout
+            self.prefix_sums = StreamingPrefixSums(channels, samples)
+        channels, _, samples, dtype = self._layout
+        column_bytes = samples * dtype.itemsize
+        while self._channels_done < channels:
+            start = BINARY_HEADER.size + self._channels_done * column_bytes
+            if start + column_bytes > end:
+                break
+            column = np.frombuffer(r.view(start, start + column_bytes), dtype=dtype)
+            self.prefix_sums.add_channel(self._channels_done, column)
+            self._channels_done += 1
+
+    def finish(self, payload):
+        """(raw_emg, labels, prefix_sums) of the complete upload, or None if streaming failed."""
+        if self.failed is None:
+            try:
+                if self.data_format == "CSV":
+                    self._update_csv(final=True)
+                    rows = self._rows[:self.n_rows]
+                    raw_emg, labels = rows[:, :-self.num_labels], rows[:, -self.num_labels:]
+                else:
+                    self._update_binary()
+                    raw_emg, labels = parse_binary(payload)
+                    if self._channels_done != raw_emg.shape[1]:
+                        raise ValueError("binary upload ended before all channels were summed")
+                return raw_emg, labels, self.prefix_sums.finish()
+            except Exception as e:
+                self.failed = str(e)
+        return None
+
+
+def encode_binary(raw_emg, labels):
+    """Build an F32 upload (the app's encoder, for tools and tests)."""
+    raw_emg = np.asarray(raw_emg)
+    labels = np.asarray(labels)
+    header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, raw_emg.shape[1], labels.shape[1], 1, len(raw_emg))
+    return header + np.asfortranarray(raw_emg, dtype="<f4").tobytes(order="F") \
+        + np.asfortranarray(labels, dtype="<f4").tobytes(order="F")
@@ -1,102 +1,87 @@
 import numpy as np
-import pandas as pd
 import json
+import queue
 import socket
 import threading
 import time
-from io import StringIO
-import tensorflow as tf
-from tensorflow.keras import layers, models
-from sklearn.linear_model import Ridge
 import base64
 import os
-import joblib
+import tempfile
 from datetime import datetime
-from sklearn.linear_model import Ridge
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, mean_absolute_error
+import backends
+from emg_features import FeatureCache, window_labels
+from grid_search import run_grid
+import ridge_solver
+from ridge_solver import ALPHA_GRID
+from training_queue import JobCancelled, TrainingJobQueue
+from chunk_reassembly import DEFAULT_CHUNK_SIZE, ChunkReassembler
+from upload_formats import UPLOAD_FORMATS, StreamingParser, parse_upload
+from upload_ack import DEFAULT_WINDOW, SackAcker, negotiate_window
+from model_download import ModelSender
+from result_cache import ResultCache, result_key
+from timer_service import TimerService
+from progress_reporter import PROGRESS_HZ, ProgressSender
 
 
 # ---------------- Trainer ----------------
 class EmgTrainer:
     """Unified EMG Trainer for Ridge and MLP models."""
 
-    def __init__(self, raw_emg_data, server=None, addr=None):
+    # Model-selection grid searched by find_best_model
+    GRID_WINDOWS = (10, 25, 35, 45, 50, 55, 60)
+    #GRID_FEATURE_SETS = (("rms",), ("mav",), ("rms", "mav"), ("rms", "mav", "var"),
+    #            ("rms", "mav", "var", "wl"), ("rms", "mav", "var", "wl", "zc"),
+    #            ("rms", "mav", "var", "wl", "zc", "ssc"))
+   # GRID_FEATURE_SETS = (("rms",), ("mav",), ("rms", "mav") , ("rms", "mav", "var"))
+    GRID_FEATURE_SETS = (("rms",),)
+
+    def __init__(self, raw_emg_data, server=None, addr=None, cache_mb=256, prefix_sums=None):
         self.raw_emg_data = raw_emg_data
         self.server = server  
         self.addr = addr      
+        self.cache_mb = cache_mb
+        self.prefix_sums = prefix_sums  # PrefixSums of raw_emg_data computed while it was uploaded, if any
+        self.feature_cache = None  # built on first preprocess, shared by every window/feature set
 
 
 
         
     # ---------------- Preprocessing ----------------
 
-    def preprocess(self, window_size=60, features=("rms", "mav")):
+    def preprocess(self, window_size=60, features=("rms", "mav"), step=1):
         """
         Extract features from raw EMG using a sliding window.
-        features = tuple/list of feature types ("rms", "mav")..
+        features = tuple/list of feature types ("rms", "mav", "var", "wl", "zc", "ssc").
+        step = hop between consecutive windows (1 = every sample offset).
+        All windows are computed at once from prefix sums and each (window, feature, step)
+        block is cached, so a grid search only concatenates cached columns (see emg_features.py).
         """
-        X_features, y_labels = [], []
-        for i in range(len(self.raw_emg_data) - window_size + 1):
-            window = self.raw_emg_data[i:i+window_size]
-            rectified = np.abs(window)
-            feat_vector = []
-
-            if "rms" in features:
-                rms = np.sqrt(np.mean(rectified**2, axis=0))
-                feat_vector.extend(rms)
-
-            if "mav" in features:
-                mav = np.mean(rectified, axis=0)
-                feat_vector.extend(mav)
-
-            if "var" in features:
-                var = np.var(rectified, axis=0)
-                feat_vector.extend(var)
-            if "wl" in features:
-                wl = np.sum(np.abs(np.diff(rectified, axis=0)), axis=0)
-                feat_vector.extend(wl)
-
-            if "zc" in features:
-                threshold = 0.01
-                zc = np.sum(((rectified[:-1] * rectified[1:]) < 0) & (np.abs(rectified[:-1] - rectified[1:]) >= threshold), axis=0)
-                
-                feat_vector.extend(zc)
-
-            if "ssc" in features:
-                threshold = 0.01
-                ssc = np.sum(((rectified[1:-1] - rectified[0:-2]) * (rectified[1:-1] - rectified[2:]) > threshold), axis=0)
-                feat_vector.extend(ssc)
-
-            X_features.append(feat_vector)
-
-        return np.array(X_features)
+        if self.feature_cache is None:
+            self.feature_cache = FeatureCache(self.raw_emg_data, max_bytes=self.cache_mb * 1024 * 1024,
+                                              prefix_sums=self.prefix_sums)
+        return self.feature_cache.features(window_size, features, step=step)
     
-    # ---------------- Ridge ----------------
-
-
-    def train_ridge_for_exo(self, X, y, alpha=1.0):
-            # y is one-hot: [[1,0,0,0], [0,1,0,0], ...]
-            y_class = np.array(y)
+    def progress_reporter(self, total):
+        """Rate-limited TRAINING_PROGRESS to the client (None when not serving a client)."""
+        if self.server is None or self.addr is None:
+            return None
+        return self.server.progress.reporter((self.addr[0], self.server.MODEL_SEND_PORT), total)
 
-            X_train, X_test, y_train, y_test = train_test_split(X, y_class, test_size=0.2, random_state=42)
+    # ---------------- Ridge ----------------
 
-            models = []
-            predictions = []
-            for i in range(4):  # Train 4 separate models for each output
-                model = Ridge(alpha=alpha)
-                model.fit(X_train, y_train[:, i])
-                models.append(model)
-                predictions.append(model.predict(X_test))
 
-            y_pred = np.column_stack(predictions)
-            mse = mean_squared_error(y_test, y_pred)
-            mae = mean_absolute_error(y_test, y_pred)
+    def train_ridge_for_exo(self, X, y, alpha=1.0, alphas=None):
+        return ridge_solver.train_ridge_for_exo(X, y, alpha=alpha, alphas=alphas)
 
-            return {"models": models, "mse": mse, "mae": mae}
+    def train_ridge(self, X, y, alpha=1.0, alphas=None):
+        return ridge_solver.train_ridge(X, y, alpha=alpha, alphas=alphas)
 
-    def train_mlp_for_exo(self, X, y, save_tflite_path="mlp_model.tflite", epochs=50, batch_size=16):
+    def train_mlp_for_exo(self, X, y, save_tflite_path="mlp_model.tflite", epochs=50, batch_size=16, cancel_event=None):
         try:
+            # Loaded on the first TFLITE job; grid-search pool workers never import TensorFlow
+            tf = backends.load("tensorflow")
+            from tensorflow.keras import layers, models
+
             # Update model to output 4 values with softmax activation
             model = models.Sequential([
                 layers.Input(shape=(X.shape[1],)),
@@ -110,29 +95,35 @@ class EmgTrainer:
                 monitor='val_loss', patience=10, restore_best_weights=True
             )
 
-            total_steps = int(np.ceil(len(X) / batch_size)) * epochs
+            validation_split = 0.2
+            # Keras trains on the first floor(n * (1 - validation_split)) samples
+            train_samples = int(np.floor(len(X) * (1.0 - validation_split)))
+            total_steps = int(np.ceil(train_samples / batch_size)) * epochs
             step_count = 0
+            progress = self.progress_reporter(total_steps)
 
             class ProgressCallback(tf.keras.callbacks.Callback):
                 def on_batch_end(self, batch, logs=None):
                     nonlocal step_count
+                    if cancel_event is not None and cancel_event.is_set():
+                        self.model.stop_training = True
+                        return
                     step_count += 1
-                    progress_msg = f"TRAINING_PROGRESS {step_count}/{total_steps}"
-                    try:
-                        self.model_ref.server.socket.sendto(progress_msg.encode(), (self.model_ref.addr[0], self.model_ref.server.MODEL_SEND_PORT))
-                    except Exception:
-                        pass  # ignore send errors
-
-            ProgressCallback.model_ref = self
+                    if progress is not None:
+                        progress.update(step_count)  # just records it; sent at most PROGRESS_HZ times a second
 
             model.fit(
                 X, y,
-                validation_split=0.2,
+                validation_split=validation_split,
                 epochs=epochs,
                 batch_size=batch_size,
                 verbose=2,
                 callbacks=[early_stop, ProgressCallback()]
             )
+            if cancel_event is not None and cancel_event.is_set():
+                raise JobCancelled("MLP training cancelled")
+            if progress is not None:
+                progress.finish(total_steps)  # complete, also when early stopping ended it sooner
 
             converter = tf.lite.TFLiteConverter.from_keras_model(model)
             tflite_model = converter.convert()
@@ -141,82 +132,132 @@ class EmgTrainer:
             print(f"💾 MLP TFLite model saved to {save_tflite_path}")
 
             return model
+        except JobCancelled:
+            raise
         except Exception as e:
             self.server.send_error(self.addr, "train_mlp_for_exo", e)
             return None
     #change the feature set and window size as per need.
-    def find_best_model(self, raw_emg, labels, model_type="RIDGE_FOR_EXO"):
-        windows = [10, 25, 35, 45, 50, 55, 60]
-        #feature_sets = [("rms",), ("mav",), ("rms", "mav"), ("rms", "mav", "var"), 
-        #            ("rms", "mav", "var", "wl"), ("rms", "mav", "var", "wl", "zc"), 
-        #            ("rms", "mav", "var", "wl", "zc", "ssc")]
-       # feature_sets = [("rms",), ("mav",), ("rms", "mav") , ("rms", "mav", "var")]
-        feature_sets = [("rms",)]
-        best_mse = float('inf')
-        best_model = None
-        best_params = {}
+    def find_best_model(self, raw_emg, labels, model_type="RIDGE_FOR_EXO", step=1, workers=1, alphas=ALPHA_GRID,
+                        cancel_event=None):
+        """
+        Grid search over window sizes and feature sets, best by test MSE.
+        Each RIDGE_FOR_EXO cell picks its own alpha from alphas by GCV (alphas=None: alpha=1.0).
+        workers > 1 (or 0 = all cores) spreads RIDGE_FOR_EXO cells over a process pool.
+        Setting cancel_event stops the search and raises JobCancelled.
+        """
+        cells = [(window_size, features) for window_size in self.GRID_WINDOWS for features in self.GRID_FEATURE_SETS]
         
-        total_iterations = len(windows) * len(feature_sets)
+        total_iterations = len(cells)
         iteration_count = 0
-
-        for window_size in windows:
-            for features in feature_sets:
+        progress = self.progress_reporter(total_iterations)
+
+        def on_result(index, result):
+            nonlocal iteration_count
+            window_size, features = cells[index]
+            if isinstance(result, Exception):
+                self.server.send_error(self.addr, f"Finding best {model_type} model: ", result)
+                print(f"Error with window={window_size}, features={features}: {result}")
+                return
+            if result is None:
+                return
+            alpha_str = f", alpha={result['alpha']:g}" if "alpha" in result else ""
+            print(f"Trained {model_type} with window={window_size}, features={features}{alpha_str}, MSE={result['mse']:.4f}")
+
+            iteration_count += 1
+            if progress is not None:
+                progress.update(iteration_count)
+
+        if model_type == "RIDGE_FOR_EXO":
+            if self.feature_cache is None:
+                self.feature_cache = FeatureCache(self.raw_emg_data, max_bytes=self.cache_mb * 1024 * 1024,
+                                              prefix_sums=self.prefix_sums)
+            results = run_grid(self.raw_emg_data, labels, cells, fit="exo", alpha=1.0, alphas=alphas, step=step,
+                               workers=workers, cache=self.feature_cache, on_result=on_result,
+                               cancel_event=cancel_event)
+        elif model_type == "TFLITE":
+            results = []
+            for index, (window_size, features) in enumerate(cells):
+                if cancel_event is not None and cancel_event.is_set():
+                    break
                 try:
-                    X = self.preprocess(window_size=window_size, features=features)
-                    y_proc = labels[:X.shape[0]]
-                    
-                    if len(y_proc) == 0:
-                        continue
-                        
-                    if model_type == "RIDGE_FOR_EXO":
-                        result = self.train_ridge_for_exo(X, y_proc, alpha=1.0)
-                    elif model_type == "TFLITE":
-                        result = self.train_mlp_for_exo(X, y_proc)
-                    else:
-                        continue
-                    
-                    if result["mse"] < best_mse:
-                        best_mse = result["mse"]
-                        best_model = result
-                        best_params = {
-                            "window_size": window_size,
-                            "features": features,
-                            "mse": result["mse"],
-                            "mae": result["mae"]
-                        }
-                    
-                    print(f"Trained {model_type} with window={window_size}, features={features}, MSE={result['mse']:.4f}")
-
-                    iteration_count += 1
-                    progress_msg = f"TRAINING_PROGRESS {iteration_count}/{total_iterations}"
-                    try:
-                        self.server.socket.sendto(progress_msg.encode(), (self.addr[0], self.server.MODEL_SEND_PORT))
-                    except Exception as e:
-                        print(f" Failed to send {model_type} progress: {e}")
-                        
+                    X = self.preprocess(window_size=window_size, features=features, step=step)
+                    y_proc = window_labels(labels, X.shape[0], step)
+                    result = self.train_mlp_for_exo(X, y_proc, cancel_event=cancel_event) if len(y_proc) else None
+                except JobCancelled:
+                    break
                 except Exception as e:
-                    self.server.send_error(self.addr, f"Finding best {model_type} model: ", e)
-                    print(f"Error with window={window_size}, features={features}: {e}")
-                    continue
+                    result = e
+                results.append(result)
+                on_result(index, result)
+        else:
+            return None, {}
+        if cancel_event is not None and cancel_event.is_set():
+            raise JobCancelled(f"{model_type} model search cancelled")
+        if progress is not None:
+            progress.finish()
+
+        # Pick the best in grid order so ties resolve the same for any worker count
+        best_mse = float('inf')
+        best_model = None
+        best_params = {}
+        for (window_size, features), result in zip(cells, results):
+            if result is None or isinstance(result, Exception):
+                continue
+            if result["mse"] < best_mse:
+                best_mse = result["mse"]
+                best_model = result
+                best_params = {
+                    "window_size": window_size,
+                    "features": features,
+                    "mse": result["mse"],
+                    "mae": result["mae"]
+                }
+                if "alpha" in result:
+                    best_params["alpha"] = result["alpha"]
         
+        if self.feature_cache is not None and self.feature_cache.misses:
+            print(f"Feature cache: {self.feature_cache.get_stats()}")
         return best_model, best_params
 
 
+
 # ---------------- UDP Server ----------------
 class UdpTrainingServer:
     MODEL_SEND_PORT = 12347
-    CHUNK_TIMEOUT = 100
-
-    def __init__(self, host='0.0.0.0', port=12346):
+    CHUNK_TIMEOUT = 100  # seconds without chunks before missing ones are requested; dropped after twice that
+    CHUNK_RESEND_INTERVAL = 5  # between resend requests to an idle upload
+    QUEUE_POSITION_INTERVAL = 5  # TRAINING_QUEUED is repeated this often until the job starts (app gives up after 20 s)
+    DATAGRAM_QUEUE_SIZE = 1024  # per handler thread; datagrams beyond this are dropped (clients resend)
+    MLP_CONFIG = {"window_size": 60, "features": ("rms", "mav"), "epochs": 50, "batch_size": 16}
+    RESULT_CACHE_VERSION = 1  # bump when training changes its results for the same upload and config
+
+    def __init__(self, host='0.0.0.0', port=12346, grid_workers=1, warmup="ridge",
+                 datagram_workers=4, training_jobs=1, result_cache_dir="result_cache", result_cache_mb=256,
+                 progress_hz=PROGRESS_HZ, max_upload_mb=64):
         try:
             self.host = host
             self.port = port
+            # Datagrams are sharded by client IP so each client's packets are handled in order
+            self.datagram_queues = [queue.Queue(maxsize=self.DATAGRAM_QUEUE_SIZE) for _ in range(max(1, datagram_workers))]
+            self.dropped_datagrams = 0
+            self.max_upload_bytes = max_upload_mb * 1024 * 1024  # reassembly buffer cap per upload
+            self.jobs = TrainingJobQueue(max_concurrent=max(1, training_jobs), on_position=self.send_queue_position)
+            self.warmup = warmup  # backends.WARMUP_SETS key, imported in the background by start()
+            self.grid_workers = grid_workers  # processes for the model-selection grid, 0 = all cores
+            # Finished models by upload content; None disables the cache
+            self.result_cache = ResultCache(result_cache_dir, result_cache_mb * 1024 * 1024) if result_cache_dir else None
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             self.socket.bind((host, port))
             self.running = False
             self.data_chunks = {}
-            self.chunk_timestamps = {}
-            self.training_locks = {}  # Add this line
+            self.completed_uploads = {}  # addr -> (total chunks, final SACK or None); answers retransmits that raced the final ACK
+            # Session deadlines; keys are (kind, addr) with kind "upload", "sack" or "completed",
+            # plus ("queue", None) for the queue position reminder
+            self.timers = TimerService()
+            self.progress = ProgressSender(self.socket, hz=progress_hz)
+            self.downloads = {}  # (client ip, transfer id) -> ModelSender, fed by MODEL_NACK / MODEL_DONE
+            self.cached_sends = {}  # client ip -> cancel event of a cached TFLite file being sent outside the queue
             print(f"Initialized UDP Training Server on {host}:{port}")
         except Exception as e:
             print(f" Error initializing server: {e}")
@@ -232,15 +273,67 @@ class UdpTrainingServer:
             print(f" Failed to send error to {addr} at stage {stage}: {e}")
 
 
+    def send_queue_position(self, job, position):
+        """Tell a waiting client its place in the training queue (1 = next to start)."""
+        self.socket.sendto(f"TRAINING_QUEUED:{position}".encode(), (job.client, self.MODEL_SEND_PORT))
+
+    def repeat_queue_positions(self):
+        """Timer callback: remind every waiting client of its position, then run again."""
+        self.jobs.repeat_positions()
+        self.timers.schedule(("queue", None), self.QUEUE_POSITION_INTERVAL, self.repeat_queue_positions)
+
+    def post_to_client(self, ip, handler, *args):
+        """Run handler(*args) on the datagram thread that handles ip. Returns False if its queue is full."""
+        q = self.datagram_queues[hash(ip) % len(self.datagram_queues)]
+        try:
+            q.put_nowait((handler, args))
+            return True
+        except queue.Full:
+            return False
+
+    def dispatch_datagram(self, data, addr):
+        if not self.post_to_client(addr[0], self.handle_data, data, addr):
+            self.dropped_datagrams += 1
+
+    def datagram_worker(self, q):
+        while True:
+            item = q.get()
+            if item is None:
+                return
+            handler, args = item
+            try:
+                handler(*args)
+            except Exception as e:
+                print(f"⚠️ Error in {handler.__name__}: {e}")
+
+    def schedule_for_client(self, key, delay, handler, *args, replace=True):
+        """
+        After delay seconds run handler(*args) on the datagram thread of key's client, so timed
+        work never races with that client's datagrams. key = (kind, addr); scheduling the same
+        key again moves the deadline (replace=False leaves a pending one alone).
+        """
+        ip = key[1][0]
+
+        def fire():
+            if not self.post_to_client(ip, handler, *args):
+                self.timers.schedule(key, 0.05, fire)  # queue full; try again shortly
+        self.timers.schedule(key, delay, fire, replace=replace)
+
     def start(self):
         try:
             self.running = True
             print(f"🚀 UDP Server started on {self.host}:{self.port}")
-            threading.Thread(target=self.cleanup_stale_chunks, daemon=True).start()
+            self.timers.start()
+            self.progress.start()
+            for i, q in enumerate(self.datagram_queues):
+                threading.Thread(target=self.datagram_worker, args=(q,), name=f"datagram-{i}", daemon=True).start()
+            self.jobs.start()
+            self.timers.schedule(("queue", None), self.QUEUE_POSITION_INTERVAL, self.repeat_queue_positions)
+            backends.warmup(backends.WARMUP_SETS[self.warmup])
             while self.running:
                 try:
                     data, addr = self.socket.recvfrom(65507)
-                    threading.Thread(target=self.handle_data, args=(data, addr), daemon=True).start()
+                    self.dispatch_datagram(data, addr)
                 except Exception as e:
                     if self.running:
                         print(f"⚠️ Error receiving data: {e}")
@@ -251,111 +344,174 @@ class UdpTrainingServer:
     def stop(self):
         try:
             self.running = False
+            self.jobs.stop()
+            self.timers.stop()
+            self.progress.stop()
+            for q in self.datagram_queues:
+                try:
+                    q.put_nowait(None)
+                except queue.Full:
+                    pass  # daemon worker, exits with the process
             self.socket.close()
-            print(" Server stopped")
+            print(f" Server stopped (jobs: {self.jobs.get_stats()}, dropped datagrams: {self.dropped_datagrams}, "
+                  f"progress messages: {self.progress.sent})")
+            if self.result_cache is not None:
+                print(f" Result cache: {self.result_cache.get_stats()}")
         except Exception as e:
             print(f" Error stopping server: {e}")
 
 
 
-    def cleanup_stale_chunks(self):
-        try:
-            while self.running:
-                now = time.time()
-                stale_addrs = []
-                for addr in list(self.chunk_timestamps.keys()):
-                    try:
-                        # Check if address still exists in data_chunks before processing
-                        if addr not in self.data_chunks:
-                            # Remove from timestamps if no longer in data_chunks
-                            self.chunk_timestamps.pop(addr, None)
-                            continue
-
-                        elapsed = now - self.chunk_timestamps[addr]
-                        if elapsed > self.CHUNK_TIMEOUT:
-                            # Instead of dropping, ask client to resend missing chunks
-                            self.request_missing_chunks(addr)
-                            print(f"⏰ Requested missing chunks from {addr}")
-                            # If still stale after second timeout, drop completely
-                            if elapsed > self.CHUNK_TIMEOUT * 2:
-                                stale_addrs.append(addr)
-
-                    except Exception as e:
-                        self.send_error(addr, "cleanup_stale_chunks", e)
-                        print(f"Error checking timeout for {addr}: {e}")
-                
-                for addr in stale_addrs:
-                    print(f" Timeout: Dropping session from {addr}")
-                    self.data_chunks.pop(addr, None)
-                    self.chunk_timestamps.pop(addr, None)
-                
-                time.sleep(5)                        
-        except Exception as e:
-            
-            for addr in list(self.chunk_timestamps.keys()):
-                try:
-                    self.send_error(addr, "cleanup_stale_chunks_fatal", e)
-                except Exception as inner:
-                    print(f" Failed to send fatal cleanup_stale_chunks error to {addr}: {inner}")
-
-            print(f" Error in cleanup_stale_chunks loop: {e}")
-
+    def on_upload_timeout(self, addr):
+        """
+        No chunk from addr for CHUNK_TIMEOUT: ask for the missing ones every CHUNK_RESEND_INTERVAL
+        and drop the session once it has been idle for twice CHUNK_TIMEOUT.
+        """
+        session = self.data_chunks.get(addr)
+        if session is None:
+            return
+        idle = time.monotonic() - session["last_chunk"]
+        if idle < self.CHUNK_TIMEOUT:
+            # A chunk arrived between the timer firing and this running
+            self.schedule_for_client(("upload", addr), self.CHUNK_TIMEOUT - idle, self.on_upload_timeout, addr)
+            return
+        if idle >= self.CHUNK_TIMEOUT * 2:
+            print(f" Timeout: Dropping session from {addr}")
+            del self.data_chunks[addr]
+            self.timers.cancel(("sack", addr))
+            return
+        self.request_missing_chunks(addr)
+        print(f"⏰ Requested missing chunks from {addr}")
+        self.schedule_for_client(("upload", addr), min(self.CHUNK_RESEND_INTERVAL, self.CHUNK_TIMEOUT * 2 - idle),
+                                 self.on_upload_timeout, addr)
+
+    def flush_sack(self, addr):
+        """Delayed SACK: chunks arrived but none of them triggered one within the SACK interval."""
+        session = self.data_chunks.get(addr)
+        if session is not None and session["sack"] is not None and session["sack"].owed:
+            self.socket.sendto(session["sack"].message(), addr)
+
+    def expire_completed_upload(self, addr):
+        self.completed_uploads.pop(addr, None)
 
     def handle_data(self, data, addr):
         try:
+            # --- Feedback for a binary model download ---
+            if data.startswith(b"MODEL_NACK:") or data.startswith(b"MODEL_DONE:"):
+                self.handle_download_feedback(data, addr)
+                return
+
             # --- If header packet (text) ---
-            try:
+            if data.startswith(b"MODEL_TYPE:"):
                 data_str = data.decode('utf-8')
-                if data_str.startswith("MODEL_TYPE:"):
-                    # Clear any existing data for this client
-                    if addr in self.data_chunks:
-                        del self.data_chunks[addr]
-                    if addr in self.chunk_timestamps:
-                        del self.chunk_timestamps[addr]
-                    lines = data_str.splitlines()
-                    model_type = lines[0].split(":")[1].strip().upper()
-                    total_chunks = int(lines[1].split(":")[1])
-                    print(f"📡 Header received from {addr}: model_type={model_type}, total_chunks={total_chunks}")
-                    self.data_chunks[addr] = {"chunks": {}, "total": total_chunks, "model_type": model_type}
-                    self.chunk_timestamps[addr] = time.time()
-                    
-                    # --- Send HEADER_ACK ---
-                    try:
-                        self.socket.sendto("HEADER_ACK".encode(), addr)
-                        print(f"✅ HEADER_ACK sent to {addr}")
-                    except Exception as e:
-                        print(f"❌ Failed to send HEADER_ACK to {addr}: {e}")
-                    return
-            except UnicodeDecodeError:
-                pass  # binary chunk, not header
+                # A new upload supersedes whatever this client had queued or training
+                cancelled = self.jobs.cancel_client(addr[0])
+                if cancelled:
+                    print(f"🛑 Cancelled {cancelled} training job(s) for {addr[0]}")
+                cached_send = self.cached_sends.pop(addr[0], None)
+                if cached_send is not None:
+                    cached_send.set()
+                # Clear any existing data for this client
+                if addr in self.data_chunks:
+                    del self.data_chunks[addr]
+                self.completed_uploads.pop(addr, None)
+                self.timers.cancel(("sack", addr))
+                self.timers.cancel(("completed", addr))
+                lines = data_str.splitlines()
+                # MODEL_TYPE:<type>[:<format>], CSV when no format is given (older apps)
+                type_fields = lines[0].split(":")
+                model_type = type_fields[1].strip().upper()
+                data_format = type_fields[2].strip().upper() if len(type_fields) > 2 else "CSV"
+                if data_format not in UPLOAD_FORMATS:
+                    raise ValueError(f"Unsupported upload format {data_format}")
+                total_chunks = int(lines[1].split(":")[1])
+                # Optional header lines after TOTAL_CHUNKS, e.g. CHUNK_SIZE:1400
+                options = dict(line.split(":", 1) for line in lines[2:] if ":" in line)
+                chunk_size = int(options.get("CHUNK_SIZE", DEFAULT_CHUNK_SIZE))
+                print(f"📡 Header received from {addr}: model_type={model_type}, format={data_format}, total_chunks={total_chunks}")
+                # Reassembly buffer for the whole upload, allocated once (oversized headers raise before it is)
+                reassembler = ChunkReassembler(total_chunks, chunk_size, max_bytes=self.max_upload_bytes)
+                # Apps that understand binary model downloads say so; older ones get base64 text chunks
+                download = options.get("MODEL_DOWNLOAD", "BASE64").strip().upper()
+                session = {"buffer": reassembler, "model_type": model_type, "format": data_format, "sack": None,
+                           "download": download, "stream": StreamingParser(reassembler, data_format),
+                           "last_chunk": time.monotonic()}
+                header_ack = "HEADER_ACK"
+                if options.get("ACK_MODE", "").strip().upper() == "SACK":
+                    # Windowed sender: cumulative + selective ACKs instead of one ACK per chunk
+                    window = negotiate_window(options.get("WINDOW", DEFAULT_WINDOW))
+                    session["sack"] = SackAcker(reassembler, window)
+                    header_ack = f"HEADER_ACK:SACK:{window}"
+                self.data_chunks[addr] = session
+                self.schedule_for_client(("upload", addr), self.CHUNK_TIMEOUT, self.on_upload_timeout, addr)
+                
+                # --- Send HEADER_ACK ---
+                try:
+                    self.socket.sendto(header_ack.encode(), addr)
+                    print(f"✅ HEADER_ACK sent to {addr}")
+                except Exception as e:
+                    print(f"❌ Failed to send HEADER_ACK to {addr}: {e}")
+                return
 
             # --- If chunk packet ---
-            if addr not in self.data_chunks:
+            view = memoryview(data)
+            chunk_index = int.from_bytes(view[:4], 'big')
+            session = self.data_chunks.get(addr)
+            if session is None:
+                completed = self.completed_uploads.get(addr)
+                if completed is not None and int.from_bytes(view[4:8], 'big') == completed[0]:
+                    # Retransmit of an upload we already have: the final ACK was lost
+                    final_sack = completed[1]
+                    self.socket.sendto(final_sack if final_sack is not None else f"ACK:{chunk_index}".encode(), addr)
+                    self.socket.sendto("ALL_CHUNKS_RECEIVED".encode(), addr)
+                    return
                 print(f"⚠️ Chunk received before header from {addr}")
                 return
 
-            header = data[:8]
-            chunk_index = int.from_bytes(header[:4], 'big')
-            total_chunks = int.from_bytes(header[4:8], 'big')
-            chunk_data = data[8:]
-
-            self.data_chunks[addr]["chunks"][chunk_index] = chunk_data
-            self.chunk_timestamps[addr] = time.time()
-            self.socket.sendto(f"ACK:{chunk_index}".encode(), addr)
-            print(f"✅ ACK sent for chunk {chunk_index} to {addr}")
+            reassembler = session["buffer"]
+            prev_contiguous, prev_highest = reassembler.contiguous, reassembler.highest
+            is_new = reassembler.add(chunk_index, view[8:])  # copied once, into its slot
+
+            session["last_chunk"] = time.monotonic()
+            self.schedule_for_client(("upload", addr), self.CHUNK_TIMEOUT, self.on_upload_timeout, addr)
+            sack = session["sack"]
+            urgent = sack is not None and sack.on_chunk(chunk_index, is_new, prev_contiguous, prev_highest)
+            self.ack_chunk(session, chunk_index, addr, urgent=urgent)
+            if sack is not None and not urgent and not reassembler.complete:
+                # Make sure these chunks are acknowledged even if no more arrive
+                self.schedule_for_client(("sack", addr), sack.interval, self.flush_sack, addr, replace=False)
+            if reassembler.contiguous > prev_contiguous:
+                session["stream"].update()  # parse the newly contiguous data while the rest arrives
 
             # --- Check if all chunks received ---
-            if len(self.data_chunks[addr]["chunks"]) == self.data_chunks[addr]["total"]:
-                assembled_data = b''.join(self.data_chunks[addr]["chunks"][i] for i in range(total_chunks))
-                csv_str = assembled_data.decode('utf-8')
-                model_type = self.data_chunks[addr]["model_type"]
+            if reassembler.complete:
+                payload = reassembler.payload()
+                model_type = session["model_type"]
+                data_format = session["format"]
+                download = session["download"]
+                stream = session["stream"]
                 del self.data_chunks[addr]
+                self.timers.cancel(("upload", addr))
+                self.timers.cancel(("sack", addr))
+                if sack is not None:
+                    print(f"✅ Upload from {addr} complete: {reassembler.total} chunks, {sack.sacks_sent} SACKs")
+                # Keep only what is needed to re-acknowledge, not the reassembly buffer or the parsed data
+                self.completed_uploads[addr] = (reassembler.total, sack.message() if sack is not None else None)
+                self.schedule_for_client(("completed", addr), self.CHUNK_TIMEOUT, self.expire_completed_upload, addr)
                 
                 # Send final ACK for Step D
                 self.socket.sendto("ALL_CHUNKS_RECEIVED".encode(), addr)
     
-                # Call training
-                threading.Thread(target=self.train_and_send_models, args=(csv_str, addr, model_type), daemon=True).start()
+                # Serve a cached result right away; only misses wait in the training queue
+                cache_key = None
+                if self.result_cache is not None:
+                    cache_key = result_key(payload, model_type, self.result_config(model_type, data_format))
+                    if self.send_cached_result(cache_key, model_type, addr, download):
+                        return
+
+                # Queue training
+                self.jobs.submit(addr[0], self.train_and_send_models, payload, addr, model_type, data_format, download,
+                                 stream, cache_key)
 
         except Exception as e:
             self.send_error(addr, "handle_data", e)
@@ -363,20 +519,65 @@ class UdpTrainingServer:
 
 
 
+    def ack_chunk(self, session, chunk_index, addr, urgent=False):
+        """ACK:<i> for stop-and-wait clients; for SACK clients a SACK when urgent (see SackAcker.on_chunk)."""
+        sack = session["sack"]
+        if sack is None:
+            self.socket.sendto(f"ACK:{chunk_index}".encode(), addr)
+            print(f"✅ ACK sent for chunk {chunk_index} to {addr}")
+        elif urgent:
+            self.socket.sendto(sack.message(), addr)
+            self.timers.cancel(("sack", addr))
+
     def request_missing_chunks(self, addr):
         try:
             if addr not in self.data_chunks:
                 return
-            total = self.data_chunks[addr]["total"]
-            received = self.data_chunks[addr]["chunks"]
-            for i in range(total):
-                if i not in received:
-                    self.socket.sendto(f"RESEND:{i}".encode(), addr)
-                    print(f"🔄 Requested resend for chunk {i} from {addr}")
+            session = self.data_chunks[addr]
+            if session["sack"] is not None:
+                # One SACK names every hole at once
+                self.socket.sendto(session["sack"].message(), addr)
+                return
+            for i in session["buffer"].missing():
+                self.socket.sendto(f"RESEND:{i}".encode(), addr)
+                print(f"🔄 Requested resend for chunk {i} from {addr}")
         except Exception as e:
             self.send_error(addr, "request_missing_chunks", e)
 
 
+    def handle_download_feedback(self, data, addr):
+        kind, transfer_id, *rest = data.decode().split(":")
+        sender = self.downloads.get((addr[0], int(transfer_id)))
+        if sender is None:
+            return
+        if kind == "MODEL_DONE":
+            sender.on_done()
+        elif rest and rest[0]:
+            sender.on_nack(int(i) for i in rest[0].split(","))
+
+    def send_model_file(self, file_path, addr, download="BASE64", cancel_event=None):
+        if download != "BINARY":
+            self.send_file_udp(file_path, addr)
+            return
+        try:
+            sender = ModelSender(self.socket, (addr[0], self.MODEL_SEND_PORT), file_path)
+            key = (addr[0], sender.transfer_id)
+            self.downloads[key] = sender
+            print(f"📤 Sending {file_path} ({sender.size} bytes, {sender.total} chunks) to {addr}")
+            try:
+                started = time.time()
+                delivered = sender.run(cancel_event)
+            finally:
+                self.downloads.pop(key, None)
+            if delivered:
+                print(f"✅ {file_path} delivered to {addr} in {time.time() - started:.2f}s "
+                      f"({sender.packets_sent} packets, {sender.retransmits} resent)")
+            elif cancel_event is None or not cancel_event.is_set():
+                raise TimeoutError(f"no confirmation after {sender.packets_sent} packets")
+        except Exception as e:
+            self.send_error(addr, "send_model_file", e)
+            print(f" Error sending file {file_path} to {addr}: {e}")
+
     def send_file_udp(self, file_path, addr, chunk_size=60000):
         try:
             with open(file_path, "rb") as f:
@@ -401,56 +602,123 @@ class UdpTrainingServer:
             print(f" Error sending file {file_path} to {addr}: {e}")
 
 
-    def train_and_send_models(self, csv_str, addr, model_type):
-            if addr not in self.training_locks:
-                self.training_locks[addr] = threading.Lock()
+    def result_config(self, model_type, data_format):
+        """Everything besides the upload bytes that decides the trained model (part of the result cache key)."""
+        config = {"version": self.RESULT_CACHE_VERSION, "format": data_format}
+        if model_type == "RIDGE_FOR_EXO":
+            config.update(windows=EmgTrainer.GRID_WINDOWS, feature_sets=EmgTrainer.GRID_FEATURE_SETS,
+                          alphas=ALPHA_GRID, step=1)
+        elif model_type == "TFLITE":
+            config.update(mlp=self.MLP_CONFIG)
+        return config
+
+    def send_cached_result(self, key, model_type, addr, download):
+        """
+        Send a previously trained model for this upload, without queueing behind other clients' training.
+        Runs on the client's datagram thread, so a TFLite file goes out on its own thread (its MODEL_NACKs
+        arrive on this one); a new upload from the client cancels it. Returns False on a cache miss.
+        """
+        if model_type == "RIDGE_FOR_EXO":
+            cached = self.result_cache.get_bytes(key, ".json")
+            if cached is None:
+                return False
+            self.socket.sendto(cached, (addr[0], self.MODEL_SEND_PORT))
+        elif model_type == "TFLITE":
+            path = self.result_cache.get(key, ".tflite")
+            if path is None:
+                return False
+            cancel_event = threading.Event()
+            self.cached_sends[addr[0]] = cancel_event
+            threading.Thread(target=self.send_cached_file, args=(path, addr, download, cancel_event),
+                             name="cached-send", daemon=True).start()
+        else:
+            return False
+        print(f" {model_type} result for {addr} served from cache ({self.result_cache.get_stats()})")
+        return True
+
+    def send_cached_file(self, path, addr, download, cancel_event):
+        try:
+            self.send_model_file(path, addr, download, cancel_event=cancel_event)
+        finally:
+            if self.cached_sends.get(addr[0]) is cancel_event:
+                del self.cached_sends[addr[0]]
+
+    def train_and_send_models(self, job, payload, addr, model_type, data_format="CSV", download="BASE64", stream=None,
+                              cache_key=None):
+        """Training job run by self.jobs; stops quietly if the client starts a new upload.
+        payload is the assembled upload (bytes-like) in data_format, parsed without copying it first.
+        stream is the upload's StreamingParser; what it parsed during the upload is used if it succeeded.
+        cache_key is the upload's result cache key (None when the cache is off); the model is stored under it."""
+        try:
+            print(f" Training {model_type} model for {addr}...")
+            parsed = stream.finish(payload) if stream is not None else None
+            if parsed is not None:
+                raw_emg, labels, prefix_sums = parsed
+            else:
+                if stream is not None:
+                    print(f" Streaming parse for {addr} gave up ({stream.failed}); parsing the whole upload")
+                raw_emg, labels = parse_upload(payload, data_format)
+                prefix_sums = None
+
+            trainer = EmgTrainer(raw_emg, server=self, addr=addr, prefix_sums=prefix_sums)
+            
+            if model_type == "RIDGE_FOR_EXO":
+                best_model, best_params = trainer.find_best_model(raw_emg, labels, "RIDGE_FOR_EXO", workers=self.grid_workers,
+                                                                  cancel_event=job.cancel_event)
+                
                 
-            with self.training_locks[addr]:    
+                models_list = []
+                output_names = ["isometric", "extension", "flexion", "rest"]
+                
+                for i, output_name in enumerate(output_names):
+                    models_list.append({
+                        "name": output_name,
+                        "intercept": best_model["models"][i].intercept_,
+                        "coef": best_model["models"][i].coef_.tolist()
+                    })
+                
+                ridge_exo_json = {
+                    "type": "RIDGE_FOR_EXO",
+                    "models": models_list,
+                    "preprocessing": best_params
+                }
+                job.check_cancelled()
+                ridge_exo_bytes = json.dumps(ridge_exo_json).encode()
+                if cache_key is not None:
+                    self.result_cache.put(cache_key, ".json", data=ridge_exo_bytes)
+                self.socket.sendto(ridge_exo_bytes, (addr[0], self.MODEL_SEND_PORT))
+
+            elif model_type == "TFLITE":
+                # Use default preprocessing for MLP
+                mlp = self.MLP_CONFIG
+                X = trainer.preprocess(window_size=mlp["window_size"], features=mlp["features"])
+                y_proc = labels[:X.shape[0]]
+                # Per-job file: concurrent jobs (--training-jobs > 1) must not overwrite each other's model.
+                # Dot-prefixed so a leftover is never picked up as a cache entry.
+                fd, mlp_path = tempfile.mkstemp(suffix=".tflite", prefix=".mlp-",
+                                                dir=self.result_cache.directory if self.result_cache is not None else None)
+                os.close(fd)
                 try:
-                    print(f" Training {model_type} model for {addr}...")
-                    df = pd.read_csv(StringIO(csv_str))
-                    raw_emg = df.iloc[:, :-4].values  # First 8 columns are EMG data
-                    labels = df.iloc[:, -4:].values   # Last 4 columns are one-hot labels
-
-                    trainer = EmgTrainer(raw_emg, server=self, addr=addr)
-                    
-                    if model_type == "RIDGE_FOR_EXO":
-                        best_model, best_params = trainer.find_best_model(raw_emg, labels, "RIDGE_FOR_EXO")
-                        
-                        
-                        models_list = []
-                        output_names = ["isometric", "extension", "flexion", "rest"]
-                        
-                        for i, output_name in enumerate(output_names):
-                            models_list.append({
-                                "name": output_name,
-                                "intercept": best_model["models"][i].intercept_,
-                                "coef": best_model["models"][i].coef_.tolist()
-                            })
-                        
-                        ridge_exo_json = {
-                            "type": "RIDGE_FOR_EXO",
-                            "models": models_list,
-                            "preprocessing": best_params
-                        }
-                        self.socket.sendto(json.dumps(ridge_exo_json).encode(), (addr[0], self.MODEL_SEND_PORT))
-
-                    elif model_type == "TFLITE":
-                        # Use default preprocessing for MLP
-                        X = trainer.preprocess()
-                        y_proc = labels[:X.shape[0]]
-                        mlp_path = "mlp_model.tflite"
-                        trainer.train_mlp_for_exo(X, y_proc, save_tflite_path=mlp_path)
-                        self.send_file_udp(mlp_path, addr)
-
-                    print(f" {model_type} training complete for {addr}")
-
-                except Exception as e:
-                    self.send_error(addr, "train_and_send_models", e)
-                    print(f" Training error: {e}")
+                    model = trainer.train_mlp_for_exo(X, y_proc, save_tflite_path=mlp_path, epochs=mlp["epochs"],
+                                                      batch_size=mlp["batch_size"], cancel_event=job.cancel_event)
+                    if model is None:
+                        # Training failed (already reported to the client); never cache or send a stale file
+                        return
+                    job.check_cancelled()
+                    if cache_key is not None:
+                        self.result_cache.put(cache_key, ".tflite", src_path=mlp_path)
+                    self.send_model_file(mlp_path, addr, download, cancel_event=job.cancel_event)
                 finally:
-                    if addr in self.training_locks:
-                        del self.training_locks[addr]
+                    os.unlink(mlp_path)
+
+            print(f" {model_type} training complete for {addr}")
+
+        except JobCancelled:
+            print(f" {model_type} training for {addr} cancelled")
+            raise  # counted as cancelled by the job queue
+        except Exception as e:
+            self.send_error(addr, "train_and_send_models", e)
+            print(f" Training error: {e}")
 
 
 LOG_FILE = "ridge_experiments_log.json"
@@ -488,10 +756,12 @@ def log_experiment(window_size, features, mse, mae, model_file):
 
 import itertools
 
-def start_standalone_training(csv_path):
-    """Train Ridge models locally from CSV, log experiments, and show results."""
+def start_standalone_training(csv_path, workers=1):
+    """Train Ridge models locally from CSV, log experiments, and show results.
+    workers > 1 (or 0 = all cores) fits the experiments on a process pool."""
     try:
         print(f"📂 Training from local file: {csv_path}")
+        pd = backends.load("pandas")
         df = pd.read_csv(csv_path)
         raw_emg = df.iloc[:, :-1].values
         labels = pd.to_numeric(df.iloc[:, -1], errors="coerce").astype(float)
@@ -512,16 +782,24 @@ def start_standalone_training(csv_path):
         experiments = [{"window_size": w, "features": f} for w in windows for f in feature_sets]
 
         all_results = []
-
-        for exp in experiments:
-            trainer = EmgTrainer(raw_emg)
-            X = trainer.preprocess(window_size=exp["window_size"], features=exp["features"])
-            y_proc = labels[:X.shape[0]]  # align labels
-
-            model, mse, mae = trainer.train_ridge(X, y_proc, alpha=1.0)
+        # One trainer for the whole recording so its feature cache is shared by every experiment
+        trainer = EmgTrainer(raw_emg)
+        trainer.feature_cache = FeatureCache(raw_emg, max_bytes=trainer.cache_mb * 1024 * 1024)
+        cells = [(exp["window_size"], exp["features"]) for exp in experiments]
+        results = run_grid(raw_emg, labels, cells, fit="single", alpha=1.0, alphas=ALPHA_GRID,
+                           workers=workers, cache=trainer.feature_cache)
+
+        # Saved and logged in grid order whatever order the workers finished in
+        for exp, result in zip(experiments, results):
+            if isinstance(result, Exception):
+                print(f" Error with {exp}: {result}")
+                continue
+            if result is None:
+                continue
+            model, mse, mae = result["model"], result["mse"], result["mae"]
 
             model_file = f"ridge_ws{exp['window_size']}_{'+'.join(exp['features'])}.pkl"
-            joblib.dump(model, model_file)
+            backends.load("joblib").dump(model, model_file)
 
             log_experiment(exp["window_size"], exp["features"], mse, mae, model_file)
 
@@ -532,7 +810,10 @@ def start_standalone_training(csv_path):
                 "mae": mae,
                 "model_file": model_file
             })
-            print(f" Trained Ridge with {exp}, MSE={mse:.4f}, MAE={mae:.4f}")
+            print(f" Trained Ridge with {exp}, alpha={result['alpha']:g}, MSE={mse:.4f}, MAE={mae:.4f}")
+
+        if trainer.feature_cache.misses:
+            print(f"Feature cache: {trainer.feature_cache.get_stats()}")
 
         # ---------------- Show all results ----------------
         print("\n All Experiments:")
@@ -566,12 +847,31 @@ if __name__ == "__main__":
     parser.add_argument('--csv', help='Path to CSV file for training')
     parser.add_argument('--host', default='0.0.0.0', help='Host for server mode')
     parser.add_argument('--port', type=int, default=12346, help='Port for server mode')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes for the model-selection grid search (0 = all cores)')
+    parser.add_argument('--datagram-workers', type=int, default=4,
+                        help='Threads handling received datagrams')
+    parser.add_argument('--training-jobs', type=int, default=1,
+                        help='Training jobs run at the same time; further uploads wait in the queue')
+    parser.add_argument('--result-cache', default='result_cache',
+                        help='Directory caching trained models by upload content ("" to disable)')
+    parser.add_argument('--result-cache-mb', type=int, default=256,
+                        help='Size cap of the result cache; least recently used models are evicted')
+    parser.add_argument('--progress-hz', type=float, default=PROGRESS_HZ,
+                        help='Most TRAINING_PROGRESS messages per second to a client (0 = every update)')
+    parser.add_argument('--max-upload-mb', type=int, default=64,
+                        help='Largest upload accepted; bigger headers are rejected before allocating')
+    parser.add_argument('--warmup', choices=sorted(backends.WARMUP_SETS), default='ridge',
+                        help='ML backends to import in the background once the server is listening')
     
     args = parser.parse_args()
     
     if args.mode == 'server':
         # Start UDP server
-        server = UdpTrainingServer(host=args.host, port=args.port)
+        server = UdpTrainingServer(host=args.host, port=args.port, grid_workers=args.workers, warmup=args.warmup,
+                                   datagram_workers=args.datagram_workers, training_jobs=args.training_jobs,
+                                   result_cache_dir=args.result_cache, result_cache_mb=args.result_cache_mb,
+                                   progress_hz=args.progress_hz, max_upload_mb=args.max_upload_mb)
         try:
             server.start()
         except KeyboardInterrupt:
@@ -583,4 +883,4 @@ if __name__ == "__main__":
         if not args.csv:
             print("Please specify a CSV file with --csv argument")
             exit(1)
-        start_standalone_training(args.csv)
+        start_standalone_training(args.csv, workers=args.workers)